@@ -0,0 +1,63 @@
+"""
+Compare the speed and file size of the json codecs and formats used to save and load decks.
+
+Run from the repository root with `python -m benchmarks.codec [NUMBER_OF_CARDS ...]`.
+"""
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from flashcards import decks
+
+CARD_COUNTS = [10_000, 100_000]
+
+
+def make_deck(num_cards: int) -> decks.Deck:
+    deck = decks.Deck("Benchmark", "A synthetic deck.")
+    deck.cards = [
+        {"question": f"What is {i} squared?", "answer": f"{i * i}, of course."}
+        for i in range(num_cards)
+    ]
+    decks.assign_card_ids(deck.cards)
+    return deck
+
+
+def time_call(function) -> float:
+    """Get the best time, in seconds, of three calls of *function*."""
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(card_counts: list):
+    orjson = decks.get_orjson()
+    codecs = [("json", None)] + ([("orjson", orjson)] if orjson is not None else [])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        decks.storage_path = lambda: Path(tmp_dir)
+
+        print(
+            f"{'cards':>8} {'codec':>7} {'format':>9} {'save (s)':>9} {'load (s)':>9} {'size':>9}"
+        )
+        for num_cards in card_counts:
+            deck = make_deck(num_cards)
+            for codec, module in codecs:
+                decks.orjson, decks.orjson_imported = module, True
+                for deck_format in ("indented", "compact"):
+                    os.environ[decks.FORMAT_ENV_VAR] = deck_format
+                    save = time_call(deck.save)
+                    load = time_call(lambda: decks.load_deck(deck.filepath))
+                    size = deck.filepath.stat().st_size / 1024 / 1024
+                    print(
+                        f"{num_cards:>8} {codec:>7} {deck_format:>9} {save:>9.3f} {load:>9.3f} "
+                        f"{size:>7.1f}MB"
+                    )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or CARD_COUNTS)
@@ -0,0 +1,53 @@
+"""
+Compare the memory used by cards held as dicts and as Card objects.
+
+Run from the repository root with `python -m benchmarks.memory [NUMBER_OF_CARDS ...]`.
+"""
+import gc
+import sys
+import tracemalloc
+
+from flashcards import decks
+
+CARD_COUNTS = [100_000, 1_000_000]
+
+
+def card_dicts(num_cards: int) -> list:
+    """Get card dicts as they are stored in a deck file, half of them already scheduled."""
+    cards = []
+    for i in range(num_cards):
+        card = {"question": f"What is {i} squared?", "answer": f"{i * i}", "id": f"{i:032x}"}
+        if i % 2:
+            card.update(ease=2.5, interval=6, repetitions=2, due=1_700_000_000 + i)
+        cards.append(card)
+    return cards
+
+
+def measure(function) -> int:
+    """Get the memory, in bytes, still allocated by what *function* returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(card_counts: list):
+    print(f"{'cards':>9} {'dicts (MB)':>11} {'Cards (MB)':>11} {'saved':>6}")
+    for num_cards in card_counts:
+        cards = card_dicts(num_cards)
+
+        # the strings are shared by both, so only the containers of the fields are measured
+        as_dicts = measure(lambda: [dict(card) for card in cards])
+        as_cards = measure(lambda: [decks.Card.from_dict(card) for card in cards])
+
+        print(
+            f"{num_cards:>9} {as_dicts / 1024 / 1024:>11.1f} {as_cards / 1024 / 1024:>11.1f} "
+            f"{1 - as_cards / as_dicts:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or CARD_COUNTS)
@@ -0,0 +1,49 @@
+"""
+Measure how long `flashcards status` takes from process start to exit.
+
+Run from the repository root with `python -m benchmarks.startup`. Exits with an error if the time
+spent on top of starting the interpreter and importing click (which most of the startup time goes
+to, and which isn't this package's to speed up) is over the target (--target, in milliseconds).
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+TARGET_MS = 50
+BASELINE = "python -c 'import click'"
+COMMANDS = {
+    "python -c pass": [sys.executable, "-c", "pass"],
+    "python -c 'import click'": [sys.executable, "-c", "import click"],
+    "flashcards status": [sys.executable, "-c", "from flashcards.main import cli; cli()", "status"],
+}
+
+
+def median_ms(command: list, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--target", type=float, default=TARGET_MS)
+    args = parser.parse_args(argv)
+
+    times = {name: median_ms(command, args.runs) for name, command in COMMANDS.items()}
+    for name, milliseconds in times.items():
+        print(f"{name:<26} {milliseconds:6.1f} ms")
+
+    overhead = times["flashcards status"] - times[BASELINE]
+    print(f"{'overhead over click':<26} {overhead:6.1f} ms (target: {args.target:g} ms)")
+    if overhead > args.target:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Measure how the deck storage functions and the CLI commands scale with the size of a collection.
+
+Each scenario generates a synthetic storage directory with a number of decks of a number of cards,
+then records the time and the peak (Python) memory of each operation. Results are written as json,
+so that runs can be compared to catch regressions in the hot paths.
+
+Run from the repository root with `python -m benchmarks.suite`; see --help for the options. Pass
+the results of an earlier run with --baseline to fail when an operation has become slower.
+"""
+import argparse
+import json
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from flashcards import decks, editor
+from flashcards.main import cli
+
+# (number of decks, cards per deck)
+SCENARIOS = {
+    "quick": [(1, 10), (1, 10_000), (100, 100), (1000, 10)],
+    "full": [(1, 10), (1, 10_000), (1, 100_000), (1, 1_000_000), (100, 1000), (1000, 10)],
+}
+
+
+def generate_storage(path: Path, num_decks: int, cards_per_deck: int):
+    """Fill the storage directory at *path* with synthetic decks, and select the first one."""
+    for deck_num in range(num_decks):
+        deck = decks.Deck(f"Deck {deck_num:04}", f"Synthetic deck number {deck_num}.")
+        deck.cards = [
+            {"question": f"What is {i} times {deck_num}?", "answer": f"It is {i * deck_num}."}
+            for i in range(cards_per_deck)
+        ]
+        deck.create_file()
+        deck.save()
+    decks.link_selected_deck(decks.generate_deck_filepath("Deck 0000"))
+
+
+def measure(function, repeat: int = 3) -> dict:
+    """Get the best time of *repeat* calls of *function*, and the peak memory of one more call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_bytes": peak}
+
+
+def invoke(args: list, input: str = None):
+    """Return a function that runs a CLI command, failing loudly if the command fails."""
+
+    def run():
+        result = CliRunner().invoke(cli, args, input=input)
+        if result.exception is not None and not isinstance(result.exception, SystemExit):
+            raise result.exception
+
+    return run
+
+
+def cached(function):
+    """Return a function that runs *function* with decks kept in a cache between runs, as they are
+    in a shell session; the other operations load every deck from its file."""
+    cache = decks.DeckCache()
+
+    def run():
+        with patch.object(decks, "deck_cache", cache):
+            function()
+
+    return run
+
+
+def edit_card_parsing(lines: int):
+    """Return a function that parses an edited card of *lines* lines, without an editor."""
+    card = {"question": "\n".join(["question"] * lines), "answer": "\n".join(["answer"] * lines)}
+    edited = (
+        "\n".join(["new question"] * lines)
+        + f"\n{editor.Q_INSTRUCTION}\n"
+        + "\n".join(["new answer"] * lines)
+        + f"\n{editor.A_INSTRUCTION}"
+    )
+
+    def run():
+        with patch("flashcards.editor.prompt_via_editor", return_value=edited):
+            editor.edit_card(card)
+
+    return run
+
+
+def run_scenario(num_decks: int, cards_per_deck: int) -> dict:
+    """Generate a storage directory and measure each operation on it."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Path(tmp_dir)
+        # CliRunner runs every command in this process, so the deck cache would otherwise turn
+        # the loads being measured into cache hits
+        with patch.object(decks, "storage_path", lambda: storage), patch.object(
+            decks, "deck_cache", None
+        ):
+            generate_storage(storage, num_decks, cards_per_deck)
+            deck_path = decks.generate_deck_filepath("Deck 0000")
+            deck = decks.load_deck(deck_path)
+
+            def list_without_index():
+                decks.index_path().unlink()
+                invoke(["list"])()
+
+            operations = {
+                "load_deck": lambda: decks.load_deck(deck_path),
+                "Deck.save": deck.save,
+                "list_decks": lambda: decks.load_summaries(decks.deck_paths()),
+                "cli list": invoke(["list"]),
+                "cli list (no index)": list_without_index,
+                "cli status": invoke(["status"]),
+                "cli add": invoke(["add"], input="Question?\nAnswer.\n"),
+                "cli study (first card)": invoke(["study"], input="q"),
+                "cli study all (first card)": invoke(["study", "all"], input="q"),
+                "cli study --due (first card)": invoke(["study", "--due"], input="q"),
+                "cli search": invoke(["search", "times", "7"]),
+                "editor.edit_card (1000 lines)": edit_card_parsing(1000),
+                "load_deck (cached)": cached(lambda: decks.load_deck(deck_path)),
+                "cli study (first card, cached)": cached(invoke(["study"], input="q")),
+            }
+
+            return {
+                "decks": num_decks,
+                "cards_per_deck": cards_per_deck,
+                "deck_file_bytes": deck_path.stat().st_size,
+                "operations": {name: measure(function) for name, function in operations.items()},
+            }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Get the (scenario, operation, ratio) of operations over *tolerance* times slower than in
+    *baseline*."""
+    baseline_times = {
+        (scenario["decks"], scenario["cards_per_deck"], name): result["seconds"]
+        for scenario in baseline["scenarios"]
+        for name, result in scenario["operations"].items()
+    }
+
+    slower = []
+    for scenario in results["scenarios"]:
+        for name, result in scenario["operations"].items():
+            key = (scenario["decks"], scenario["cards_per_deck"], name)
+            if key in baseline_times and baseline_times[key] > 0:
+                ratio = result["seconds"] / baseline_times[key]
+                if ratio > tolerance:
+                    slower.append((f"{key[0]} x {key[1]}", name, ratio))
+    return slower
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", choices=SCENARIOS, default="quick")
+    parser.add_argument("--output", type=Path, help="write the json results to this file")
+    parser.add_argument("--baseline", type=Path, help="json results of an earlier run to compare")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="how many times slower than the baseline an operation may be (default 1.5)",
+    )
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "orjson": decks.get_orjson() is not None,
+        "scenarios": [],
+    }
+    for num_decks, cards_per_deck in SCENARIOS[args.scenarios]:
+        scenario = run_scenario(num_decks, cards_per_deck)
+        results["scenarios"].append(scenario)
+
+        print(f"\n{num_decks} deck(s) x {cards_per_deck} cards", file=sys.stderr)
+        for name, result in scenario["operations"].items():
+            print(
+                f"  {name:<32} {result['seconds'] * 1000:>10.1f} ms "
+                f"{result['peak_bytes'] / 1024 / 1024:>9.1f} MB",
+                file=sys.stderr,
+            )
+
+    output = json.dumps(results, indent=4)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        slower = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for scenario, name, ratio in slower:
+            print(f"REGRESSION: {name} ({scenario}) is {ratio:.1f}x slower", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
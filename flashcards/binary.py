@@ -0,0 +1,196 @@
+"""
+Read and write decks in a binary format, in which each card can be read on its own.
+
+A binary deck file is laid out as follows (integers are little-endian):
+
+    header        b"FCDK", format version (u16), reserved (u16), number of cards (u64), length of
+                  the metadata (u32)
+    metadata      json object with the deck's name and description, and (since files record it)
+                  a time before which none of its cards are due ("next_due")
+    offset table  for each card, the position of its record in the file (u64)
+    records       for each card, its id, question, answer, and the json of its other fields (e.g.
+                  scheduling) if any, each as a length (u32) followed by that many bytes of UTF-8
+
+The file is read through mmap, so opening a deck costs the same whatever its size, and a card is
+only decoded when it is accessed.
+"""
+from collections.abc import MutableMapping, Sequence
+import mmap
+import struct
+
+from flashcards import decks
+
+MAGIC = b"FCDK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQI")
+OFFSET = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+RECORD_FIELDS = ("id", "question", "answer")  # fields that get their own blob in a record
+
+
+def encode_card(card: dict) -> bytes:
+    """Get the binary record of a card."""
+    others = {key: value for key, value in card.items() if key not in RECORD_FIELDS}
+    blobs = [card[field].encode("utf-8") for field in RECORD_FIELDS]
+    blobs.append(decks.encode(others, compact=True) if others else b"")
+    return b"".join(LENGTH.pack(len(blob)) + blob for blob in blobs)
+
+
+def encode_deck(deck) -> bytes:
+    """Get the contents of a binary file for *deck*.
+
+    Records of cards that were never decoded are copied from the deck's file as they are.
+    """
+    fields = {"name": deck.name, "description": deck.description}
+    if isinstance(deck.cards, LazyCards):
+        fields.update(deck.cards.next_due())
+    else:
+        fields["next_due"] = decks.earliest_due(deck.cards)
+    metadata = decks.encode(fields, compact=True)
+
+    if isinstance(deck.cards, LazyCards):
+        records = [deck.cards.record(index) for index in range(len(deck.cards))]
+    else:
+        records = [encode_card(card) for card in deck.cards]
+
+    offsets = []
+    offset = HEADER.size + len(metadata) + OFFSET.size * len(records)
+    for record in records:
+        offsets.append(OFFSET.pack(offset))
+        offset += len(record)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(records), len(metadata))
+    return b"".join([header, metadata, *offsets, *records])
+
+
+class LazyCards(Sequence):
+    """The cards of a binary deck file, decoded as they are accessed.
+
+    Decoded cards are kept, so that changes made to them are kept too. Cards can be appended,
+    as to a list.
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.buffer) < HEADER.size:
+            raise ValueError("The deck file is corrupted - it is too short.")
+        magic, version, _, card_count, metadata_length = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("The deck file is corrupted - it is not a binary deck.")
+        if version != VERSION:
+            raise ValueError(f"The deck file has an unknown binary format version ({version}).")
+
+        self.metadata = decks.decode(self.buffer[HEADER.size : HEADER.size + metadata_length])
+        self.card_count = card_count  # number of cards in the file
+        self.offsets_start = HEADER.size + metadata_length
+        self.loaded = {}  # position -> card, for the cards in the file decoded so far
+        self.appended = []
+
+    def __len__(self):
+        return self.card_count + len(self.appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("card index out of range")
+
+        if index >= self.card_count:
+            return self.appended[index - self.card_count]
+        if index not in self.loaded:
+            self.loaded[index] = self.decode_card(index)
+        return self.loaded[index]
+
+    def append(self, card: MutableMapping):
+        """Add a card after the cards in the file."""
+        self.appended.append(card)
+
+    def blobs(self, index: int, number: int = 4) -> list:
+        """Get the first *number* blobs of the record of the card at *index* in the file."""
+        (offset,) = OFFSET.unpack_from(self.buffer, self.offsets_start + index * OFFSET.size)
+        blobs = []
+        for _ in range(number):
+            (length,) = LENGTH.unpack_from(self.buffer, offset)
+            offset += LENGTH.size
+            blobs.append(self.buffer[offset : offset + length])
+            offset += length
+        return blobs
+
+    def decode_card(self, index: int) -> decks.Card:
+        """Decode the card at *index* in the file."""
+        card_id, question, answer, others = self.blobs(index)
+        return decks.Card(
+            question.decode("utf-8"),
+            answer.decode("utf-8"),
+            card_id.decode("utf-8"),
+            **(decks.decode(others) if others else {}),
+        )
+
+    def record(self, index: int) -> bytes:
+        """Get the binary record of the card at *index*, copied from the file if not decoded."""
+        if index < self.card_count and index not in self.loaded:
+            (start,) = OFFSET.unpack_from(self.buffer, self.offsets_start + index * OFFSET.size)
+            if index + 1 < self.card_count:
+                (end,) = OFFSET.unpack_from(
+                    self.buffer, self.offsets_start + (index + 1) * OFFSET.size
+                )
+            else:
+                end = len(self.buffer)
+            return self.buffer[start:end]
+        return encode_card(self[index])
+
+    def next_due(self) -> dict:
+        """Get {"next_due": a time before which none of the cards are due}, from the file's
+        metadata and the cards decoded or appended since, without decoding any other cards; or {}
+        if the file doesn't say."""
+        if len(self.loaded) == self.card_count:  # all of the cards are in hand
+            return {"next_due": decks.earliest_due(self)}
+        if "next_due" not in self.metadata:
+            return {}
+        # a lower bound: a decoded card may have been the first due, and be due later now
+        in_hand = decks.earliest_due([*self.loaded.values(), *self.appended])
+        dues = [due for due in (self.metadata["next_due"], in_hand) if due is not None]
+        return {"next_due": min(dues, default=None)}
+
+    def positions(self, card_ids: set) -> dict:
+        """Get the positions in the file of the cards with the given ids, reading only ids."""
+        encoded_ids = {card_id.encode("utf-8") for card_id in card_ids}
+        positions: dict = {}
+        if not encoded_ids:
+            return positions
+        for index in range(self.card_count):
+            (card_id,) = self.blobs(index, number=1)
+            if card_id in encoded_ids:
+                positions[card_id.decode("utf-8")] = index
+        return positions
+
+    def find(self, card_id: str) -> decks.Card:
+        """Get the card with the given id."""
+        for card in (*self.loaded.values(), *self.appended):
+            if card["id"] == card_id:
+                return card
+
+        positions = self.positions({card_id})
+        if card_id not in positions:
+            raise KeyError(card_id)
+        return self[positions[card_id]]
+
+    def apply_journal(self, journal_cards: list):
+        """Replay journaled cards: each replaces the card with the same id, or is appended."""
+        positions = self.positions({card["id"] for card in journal_cards if "id" in card})
+        appended: dict = {}
+
+        for card in journal_cards:
+            card_id = card.get("id")
+            if card_id in positions:
+                self[positions[card_id]].update(card)
+            elif card_id in appended:
+                appended[card_id].update(card)
+            else:
+                card = decks.Card.from_dict(card)
+                self.append(card)
+                appended[card_id] = card
@@ -0,0 +1,203 @@
+"""Store decks and their cards in a SQLite database rather than in one json file per deck."""
+from contextlib import closing
+from pathlib import Path
+import sqlite3
+
+from flashcards import decks
+
+DATABASE_NAME = "flashcards.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    stem TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    card_id TEXT NOT NULL,
+    deck_id INTEGER NOT NULL REFERENCES decks (id) ON DELETE CASCADE,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    ease REAL,
+    interval INTEGER,
+    repetitions INTEGER,
+    due INTEGER
+);
+CREATE INDEX IF NOT EXISTS cards_deck_id ON cards (deck_id, id);
+CREATE INDEX IF NOT EXISTS cards_card_id ON cards (card_id);
+"""
+
+# fields of a card dict, in addition to its id, that are stored in the columns of the same name
+CARD_FIELDS = ("question", "answer", "ease", "interval", "repetitions", "due")
+
+
+def database_path() -> Path:
+    """Get the absolute path of the database in the storage directory."""
+    return decks.storage_path() / DATABASE_NAME
+
+
+def deck_stem(filepath: Path) -> str:
+    """Get the stem identifying a deck from its filepath (following the selected deck's link)."""
+    return Path(filepath).resolve().stem
+
+
+class SqliteBackend:
+    """Store all decks in a single SQLite database, one row per deck and one row per card.
+
+    Decks are still identified by the filepath generated from their name, so that the selected
+    deck link and the commands work the same way as with json files.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = database_path() if path is None else path
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the database, creating the tables if they don't exist."""
+        decks.create_storage_directory()
+        connection = sqlite3.connect(str(self.path))
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _deck_id(self, connection: sqlite3.Connection, filepath: Path) -> int:
+        row = connection.execute(
+            "SELECT id FROM decks WHERE stem = ?", (deck_stem(filepath),)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No deck found for {filepath}.")
+        return row[0]
+
+    def create(self, deck: decks.Deck):
+        """Create an empty deck."""
+        with closing(self.connect()) as connection, connection:
+            try:
+                connection.execute(
+                    "INSERT INTO decks (stem, name, description) VALUES (?, ?, ?)",
+                    (deck.filepath.stem, deck.name, deck.description),
+                )
+            except sqlite3.IntegrityError:
+                raise IOError()
+
+    def save(self, deck: decks.Deck):
+        """Save the deck and replace all of its cards."""
+        with closing(self.connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO decks (stem, name, description) VALUES (?, ?, ?) "
+                "ON CONFLICT (stem) DO UPDATE SET name = excluded.name, "
+                "description = excluded.description",
+                (deck.filepath.stem, deck.name, deck.description),
+            )
+            deck_id = self._deck_id(connection, deck.filepath)
+            connection.execute("DELETE FROM cards WHERE deck_id = ?", (deck_id,))
+            connection.executemany(
+                INSERT_CARD, ((card["id"], deck_id, *card_values(card)) for card in deck.cards)
+            )
+
+        from flashcards import search
+
+        search.deck_saved(deck)
+
+    def load(self, filepath: Path) -> decks.Deck:
+        """Load a deck and its cards, in the order they were added."""
+        with closing(self.connect()) as connection:
+            deck_id = self._deck_id(connection, filepath)
+            name, description = connection.execute(
+                "SELECT name, description FROM decks WHERE id = ?", (deck_id,)
+            ).fetchone()
+            rows = connection.execute(
+                f"SELECT card_id, {', '.join(CARD_FIELDS)} FROM cards WHERE deck_id = ? "
+                "ORDER BY id",
+                (deck_id,),
+            )
+            deck = decks.Deck(name, description)
+            deck.cards = [card_from_row(row) for row in rows]
+        return deck
+
+    def load_summary(self, filepath: Path) -> dict:
+        """Get the name, description and number of cards of a deck, without loading its cards."""
+        with closing(self.connect()) as connection:
+            deck_id = self._deck_id(connection, filepath)
+            name, description, count = connection.execute(
+                "SELECT name, description, "
+                "(SELECT COUNT(*) FROM cards WHERE deck_id = decks.id) FROM decks WHERE id = ?",
+                (deck_id,),
+            ).fetchone()
+        return {"name": name, "description": description, "count": count}
+
+    def load_summaries(self, filepaths: list) -> list:
+        """Get (filepath, summary or exception raised) pairs for several decks."""
+        summaries: list = []
+        for filepath in filepaths:
+            try:
+                summaries.append((filepath, self.load_summary(filepath)))
+            except FileNotFoundError as e:
+                summaries.append((filepath, e))
+        return summaries
+
+    def exists(self, filepath: Path) -> bool:
+        """Check whether there is a deck for *filepath*."""
+        with closing(self.connect()) as connection:
+            try:
+                self._deck_id(connection, filepath)
+            except FileNotFoundError:
+                return False
+        return True
+
+    def deck_paths(self) -> list:
+        """Get the filepaths of all decks, sorted by filename."""
+        with closing(self.connect()) as connection:
+            rows = connection.execute("SELECT stem FROM decks ORDER BY stem").fetchall()
+        return [decks.generate_deck_filepath(stem) for (stem,) in rows]
+
+    def append_cards(self, filepath: Path, cards: list):
+        """Insert cards into the deck."""
+        with closing(self.connect()) as connection, connection:
+            deck_id = self._deck_id(connection, filepath)
+            connection.executemany(
+                INSERT_CARD, ((card["id"], deck_id, *card_values(card)) for card in cards)
+            )
+
+    def update_cards(self, filepath: Path, cards: list):
+        """Update the fields of the cards with the same ids, in one transaction."""
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                f"UPDATE cards SET {', '.join(f'{field} = ?' for field in CARD_FIELDS)} "
+                "WHERE card_id = ?",
+                ((*card_values(card), card["id"]) for card in cards),
+            )
+
+    def compact(self, filepath: Path) -> decks.Deck:
+        """Cards are written as they are added, so there is nothing to fold in."""
+        return self.load(filepath)
+
+
+INSERT_CARD = (
+    f"INSERT INTO cards (card_id, deck_id, {', '.join(CARD_FIELDS)}) "
+    f"VALUES (?, ?, {', '.join('?' for field in CARD_FIELDS)})"
+)
+
+
+def card_values(card: dict) -> tuple:
+    """Get the column values of a card, with None for scheduling fields it doesn't have yet."""
+    return tuple(card.get(field) for field in CARD_FIELDS)
+
+
+def card_from_row(row: tuple) -> decks.Card:
+    """Create a card from a (card_id, *CARD_FIELDS) row; empty fields are left unset."""
+    card_id, question, answer, ease, interval, repetitions, due = row
+    return decks.Card(question, answer, card_id, ease, interval, repetitions, due)
+
+
+def import_json_decks(deck_paths: list) -> list:
+    """Copy json decks (including their journals) into the database, replacing any earlier copies.
+
+    Return (filepath, Deck or exception raised while loading it) pairs, as decks.load_decks() does.
+    """
+    backend = SqliteBackend()
+    results = decks.load_decks(deck_paths, backend=decks.JsonBackend())
+    for _, deck in results:
+        if not isinstance(deck, Exception):
+            backend.save(deck)
+    return results
@@ -1,14 +1,140 @@
 """Load and save decks; add cards to decks."""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
 import errno
+import gc
 import json
 import os
 from pathlib import Path
+import re
+import threading
+from types import ModuleType
+from typing import Optional
 
 import click
 
+from flashcards import profiling
+
+# orjson is optional, and only imported once json is first encoded or decoded (see get_orjson),
+# which not every command does
+orjson: Optional[ModuleType] = None
+orjson_imported = False  # whether orjson has been imported, or found not to be installed
+
 STORAGE_DIR_NAME = ".flashcards"
 DECK_EXTENSION = ".json"
+BINARY_DECK_EXTENSION = ".fcb"
+SHARDED_DECK_EXTENSION = ".deck"  # a directory (see flashcards.shards)
+SHARD_MANIFEST_NAME = "manifest.json"
+JOURNAL_EXTENSION = ".jsonl"
+BACKUP_EXTENSION = ".bak"
 SELECTED_DECK_NAME = ".SELECTEDDECK"
+INDEX_NAME = ".DECKINDEX"
+BACKEND_ENV_VAR = "FLASHCARDS_BACKEND"
+FORMAT_ENV_VAR = "FLASHCARDS_FORMAT"
+BACKUP_ENV_VAR = "FLASHCARDS_BACKUP"
+CACHE_SIZE_ENV_VAR = "FLASHCARDS_CACHE_SIZE"
+DEFAULT_CACHE_SIZE = 16  # decks
+LARGE_DECK_SIZE = 32 * 1024 * 1024  # bytes; json decks this big are summarized a piece at a time
+
+
+class Card(MutableMapping):
+    """A flashcard, stored in slots rather than in a dict, since a deck can hold millions of them.
+
+    A card can be used as the dict it is stored as in a deck file: fields that aren't set (e.g.
+    scheduling fields of a card that hasn't been studied yet) are left out, and any field other
+    than the known ones is kept in *extra*.
+    """
+
+    FIELDS = ("question", "answer", "id", "ease", "interval", "repetitions", "due")
+    __slots__ = (*FIELDS, "extra")
+
+    def __init__(
+        self,
+        question=None,
+        answer=None,
+        id=None,
+        ease=None,
+        interval=None,
+        repetitions=None,
+        due=None,
+        **extra,
+    ):
+        self.question = question
+        self.answer = answer
+        self.id = id
+        self.ease = ease
+        self.interval = interval
+        self.repetitions = repetitions
+        self.due = due
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, card: dict) -> "Card":
+        """Create a card from its dict in a deck file."""
+        try:
+            return cls(**card)
+        except TypeError:  # e.g. a string rather than an object
+            kind = type(card).__name__
+            raise ValueError(
+                f"The deck file is corrupted - a card should be an object, not {kind}."
+            ) from None
+
+    def to_dict(self) -> dict:
+        """Get the dict representing this card in a deck file."""
+        card = {}
+        for field in Card.FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                card[field] = value
+        if self.extra is not None:
+            card.update(self.extra)
+        return card
+
+    def __getitem__(self, key):
+        if key in CARD_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in CARD_FIELDS:
+            setattr(self, key, value)
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        self[key]  # raise a KeyError if the field isn't set
+        if key in CARD_FIELDS:
+            setattr(self, key, None)
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        for field in Card.FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Card({dict(self)!r})"
+
+
+CARD_FIELDS = frozenset(Card.FIELDS)
+
+
+def card_to_dict(card) -> dict:
+    """Get the dict representing a card (a Card or already a dict) in a deck file."""
+    return card.to_dict() if isinstance(card, Card) else card
 
 
 class Deck:
@@ -20,6 +146,8 @@ class Deck:
         self.description = "" if description is None else description
         self.cards = []
         self.filepath = generate_deck_filepath(name)
+        self.card_index = {}  # card id -> card, built on first lookup
+        self.unsaved_ids = False  # whether ids were given to cards that were stored without one
 
     def __str__(self):
         return self.name
@@ -30,43 +158,1041 @@ class Deck:
         return {
             "name": self.name,
             "description": self.description,
-            "cards": self.cards,
+            "cards": [card_to_dict(card) for card in self.cards],
         }
 
     def create_file(self):
         """Create a file for the deck."""
+        get_backend().create(self)
+
+    def save(self):
+        """Serialize and save the deck to its file."""
+        with profiling.phase("save"):
+            # cards of a binary deck file have ids already; only the cards appended since need them
+            assign_card_ids(getattr(self.cards, "appended", self.cards))
+            get_backend().save(self)
+            self.unsaved_ids = False
+
+    def get_card(self, card_id: str) -> dict:
+        """Get the card with the given id."""
+        card = self.card_index.get(card_id)
+        if card is None or card.get("id") != card_id:
+            if hasattr(self.cards, "find"):  # a binary deck's cards, which can be found lazily
+                card = self.cards.find(card_id)
+                self.card_index[card_id] = card
+                return card
+            self.card_index = {card["id"]: card for card in self.cards if "id" in card}
+            card = self.card_index[card_id]
+        return card
+
+    def write_cards(self, cards: list, text_changed: bool = True):
+        """Save cards of this deck that have been changed in place, in one write.
+
+        Only if *text_changed* (the question or answer of any of the cards) is the search index
+        updated.
+        """
+        # ids given to cards on load have to be saved before edits can refer to them
+        if self.unsaved_ids:
+            self.save()
+        else:
+            with profiling.phase("write"):
+                get_backend().update_cards(self.filepath, cards)
+            if text_changed:
+                from flashcards import search
+
+                search.cards_written(self.filepath, cards)
+
+
+class JsonBackend:
+    """Store each deck as a json file in the storage directory, with an append-only journal.
+
+    A deck can also be stored in a binary file (see flashcards.binary), whose cards are read only
+    as they are needed, or in a directory of shards (see flashcards.shards), of which only those
+    with changed cards are rewritten; which format a deck uses is given by its path's extension.
+    Cards added to or edited in a sharded deck are saved right away, rather than journaled.
+    """
 
-        if self.filepath.exists():
+    def create(self, deck: Deck):
+        """Create an empty file for the deck."""
+        if deck.filepath.exists():
             raise IOError()
 
-        open(self.filepath, "w+").close()
+        open(deck.filepath, "w+").close()
 
-    def save(self):
-        """Serialize and save the deck to its file."""
+    def save(self, deck: Deck):
+        """Serialize and save the deck to its file, folding in (and removing) its journal.
+
+        The file is replaced atomically, so an interrupted save leaves the previous version intact.
+        """
+        if is_sharded_deck(deck.filepath):
+            from flashcards import shards
+
+            shards.save_deck(deck)
+        else:
+            if is_binary_deck(deck.filepath):
+                from flashcards import binary
+
+                data = binary.encode_deck(deck)
+            else:
+                data = encode(deck.to_dict())
+            write_atomically(deck.filepath, data, backup=keep_backups())
+
+        journal = journal_path(deck.filepath)
+        if journal.exists():
+            journal.unlink()
+
+        if deck_cache is not None:
+            deck_cache.saved(deck.filepath, deck)
+
+        index = read_index()
+        entry = {
+            "name": deck.name,
+            "description": deck.description,
+            "count": len(deck.cards),
+            **file_stamp(deck.filepath),
+        }
+        entry.update(index_next_due(deck))
+        index[deck.filepath.name] = entry
+        write_index(index)
+
+        from flashcards import search
+
+        search.deck_saved(deck)
+
+    def load(self, filepath: Path) -> Deck:
+        """Load a json file and create a Deck from it.
+
+        If the file is corrupted but there is a backup of it, the backup is loaded instead. If decks
+        are being cached, a cached deck is returned when its files haven't changed.
+        """
+        if deck_cache is not None:
+            deck = deck_cache.get(filepath)
+            if deck is None:
+                deck = self.load_uncached(filepath)
+                deck_cache.put(filepath, deck)
+            return deck
+        return self.load_uncached(filepath)
+
+    def load_uncached(self, filepath: Path) -> Deck:
+        """Load a deck from its file."""
+        if is_binary_deck(filepath):
+            return self.load_binary(filepath)
+        if is_sharded_deck(filepath):
+            return self.load_sharded(filepath)
+
+        try:
+            with open(filepath, "rb") as file:
+                data = file.read()
+            profiling.count_bytes(read=len(data))
+            content = decode(data)
+        except json.decoder.JSONDecodeError:
+            backup = backup_path(filepath)
+            if not backup.exists():
+                raise
+            with open(backup, "rb") as file:
+                data = file.read()
+            profiling.count_bytes(read=len(data))
+            content = decode(data)
+            click.echo(f"The deck file {Path(filepath).name} is corrupted; loaded its backup.")
+
+        return self.deck_from_content(filepath, content)
+
+    def deck_from_content(self, filepath: Path, content: dict) -> Deck:
+        """Create a Deck from the parsed contents of its file, replaying its journal."""
+        if "name" not in content:
+            raise KeyError("The deck file is corrupted - deck 'name' key is missing.")
+        if "description" not in content:
+            raise KeyError("The deck file is corrupted - deck 'description' key is missing.")
+        if "cards" not in content:
+            raise KeyError("The deck file is corrupted - deck 'cards' key is missing.")
+        if not isinstance(content["cards"], list):
+            raise ValueError("The deck file is corrupted - 'cards' value should be a list.")
+
+        deck = Deck(content["name"], content["description"])
+        with garbage_collection_paused():
+            deck.cards = [Card.from_dict(card) for card in content["cards"]]
+
+        # a journaled card either replaces the card with the same id or is a new card
+        journal = read_journal(filepath)
+        if journal:
+            index = {card.id: card for card in deck.cards if card.id is not None}
+        for card in journal:
+            if card.get("id") in index:
+                index[card["id"]].update(card)
+            else:
+                card = Card.from_dict(card)
+                deck.cards.append(card)
+                if card.id is not None:  # later lines of the journal may edit the new card
+                    index[card.id] = card
+        deck.unsaved_ids = assign_card_ids(deck.cards)
+        return deck
+
+    def load_binary(self, filepath: Path) -> Deck:
+        """Open a binary deck file and create a Deck from it, replaying its journal.
+
+        The cards are decoded from the (memory-mapped) file only as they are accessed.
+        """
+        from flashcards import binary
+
+        cards = binary.LazyCards(filepath)
+        deck = Deck(cards.metadata["name"], cards.metadata["description"])
+        deck.filepath = Path(filepath).resolve()
+        deck.cards = cards
+        cards.apply_journal(read_journal(filepath))
+        return deck
+
+    def load_sharded(self, filepath: Path) -> Deck:
+        """Create a Deck from the manifest of a sharded deck; its shards are read only as their
+        cards are accessed."""
+        from flashcards import shards
+
+        manifest = shards.read_manifest(filepath)
+        deck = Deck(manifest["name"], manifest["description"])
+        deck.filepath = Path(filepath).resolve()
+        deck.cards = shards.ShardedCards(filepath, manifest)
+        return deck
+
+    def load_summaries(self, filepaths: list) -> list:
+        """Get the name, description and number of cards of decks from the deck index, only
+        loading (concurrently) the decks that have changed since they were indexed.
+
+        Large json decks aren't loaded, but read a piece at a time to count their cards.
+        """
+        index = read_index()
+        results: list = []
+        stale = []  # (position in results, resolved filepath, stamp)
+
+        for filepath in filepaths:
+            filepath = Path(filepath).resolve()
+            try:
+                stamp = file_stamp(filepath)
+            except OSError as e:
+                results.append(e)
+                continue
+
+            entry = index.get(filepath.name)
+            if index_entry_is_current(entry, stamp):
+                results.append(entry)
+            else:
+                stale.append((len(results), filepath, stamp))
+                results.append(None)
+
+        streamed = [
+            item
+            for item in stale
+            if is_large_json_deck(item[1]) and (deck_cache is None or not deck_cache.get(item[1]))
+        ]
+        loaded = [item for item in stale if item not in streamed]
+        summaries = load_decks([filepath for _, filepath, _ in loaded], backend=self)
+        summaries += [(filepath, self.stream_summary(filepath)) for _, filepath, _ in streamed]
+
+        for (position, filepath, stamp), (_, summary) in zip(loaded + streamed, summaries):
+            if isinstance(summary, Exception):
+                results[position] = summary
+                continue
+            if isinstance(summary, Deck):
+                deck = summary
+                summary = {
+                    "name": deck.name,
+                    "description": deck.description,
+                    "count": len(deck.cards),
+                }
+                summary.update(index_next_due(deck))
+            entry = {**summary, **stamp}
+            index[filepath.name] = entry
+            results[position] = entry
+
+        if stale:
+            write_index(index)
+
+        summaries = []
+        for filepath, result in zip(filepaths, results):
+            if not isinstance(result, Exception):
+                result = {key: result[key] for key in ("name", "description", "count")}
+            summaries.append((filepath, result))
+        return summaries
+
+    def stream_summary(self, filepath: Path):
+        """Get the summary of a json deck by reading its file a piece at a time, or the error that
+        kept it from being read; a corrupted file is loaded (from its backup) instead."""
+        try:
+            return stream_summary(filepath)
+        except json.decoder.JSONDecodeError:
+            try:
+                return self.load(filepath)
+            except Exception as e:
+                return e
+        except Exception as e:
+            return e
+
+    def exists(self, filepath: Path) -> bool:
+        """Check whether there is a deck at *filepath*."""
+        return Path(filepath).exists()
+
+    def deck_paths(self) -> list:
+        """Get the filepaths of all decks, sorted by filename."""
+        return sorted(
+            [
+                *storage_path().glob("*" + DECK_EXTENSION),
+                *storage_path().glob("*" + BINARY_DECK_EXTENSION),
+                *storage_path().glob("*" + SHARDED_DECK_EXTENSION),
+            ]
+        )
+
+    def append_cards(self, filepath: Path, cards: list):
+        """Append cards to the deck's journal, without loading or rewriting the deck file."""
+        if is_sharded_deck(filepath):
+            deck = self.load(filepath)
+            for card in cards:
+                deck.cards.append(Card.from_dict(card_to_dict(card)))
+            return self.save(deck)
+        self.journal_cards(filepath, cards, new=True)
+
+    def update_cards(self, filepath: Path, cards: list):
+        """Record edited cards in the deck's journal; each replaces the card with the same id."""
+        if is_sharded_deck(filepath):
+            deck = self.load(filepath)
+            for card in cards:
+                deck.get_card(card["id"]).update(card)
+            return self.save(deck)
+        self.journal_cards(filepath, cards, new=False)
+
+    def journal_cards(self, filepath: Path, cards: list, new: bool):
+        """Append cards to the deck's journal in one write, keeping the deck's index entry
+        current."""
+        filepath = Path(filepath).resolve()
+        index = read_index()
+        entry = index.get(filepath.name, {})
+        entry_was_current = index_entry_is_current(entry, file_stamp(filepath))
+        cached_deck = None if deck_cache is None else deck_cache.get(filepath)
+
+        lines = [encode(card_to_dict(card), compact=True) + b"\n" for card in cards]
+        data = b"".join(lines)
+        with open(journal_path(filepath), "ab") as file:
+            file.write(data)
+        profiling.count_bytes(written=len(data))
+
+        if cached_deck is not None:  # bring the cached deck up to date, as a reload would
+            for card in cards:
+                if new:
+                    cached_deck.cards.append(Card.from_dict(card_to_dict(card)))
+                else:
+                    cached_deck.get_card(card["id"]).update(card)
+            deck_cache.put(filepath, cached_deck)
+
+        if entry_was_current:
+            entry.update(file_stamp(filepath))
+            if new:
+                entry["count"] += len(cards)
+            # kept as a lower bound: an edited card that was due first may be due later now
+            if entry.get("next_due") is not None:
+                entry["next_due"] = min(entry["next_due"], earliest_due(cards))
+            elif "next_due" in entry:  # the deck had no cards
+                entry["next_due"] = earliest_due(cards)
+            write_index(index)
+
+    def compact(self, filepath: Path) -> Deck:
+        """Fold the deck's journal back into its file."""
+        deck = self.load(filepath)
+        self.save(deck)
+        return deck
+
+
+class DeckCache:
+    """Decks loaded from files, kept for as long as their files (and journals) don't change.
+
+    Loading a deck that is cached and unchanged returns the same Deck object, so a deck is parsed
+    once per process (e.g. once per "flashcards shell" session) rather than by every function
+    that needs it. Only the *max_size* most recently used decks are kept.
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size  # None: per FLASHCARDS_CACHE_SIZE
+        # resolved filepath -> (file stamp, Deck), oldest first
+        self.decks: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()  # decks are loaded from several threads by load_decks()
+
+    def get(self, filepath: Path):
+        """Get the deck loaded from *filepath*, or None if it isn't cached or has changed."""
+        filepath = Path(filepath).resolve()
+        cached = self.decks.get(filepath)
+        if cached is None:
+            return None
+
+        stamp, deck = cached
+        try:
+            current = file_stamp(filepath)
+        except OSError:
+            current = None
+        with self.lock:
+            if current != stamp:
+                self.decks.pop(filepath, None)
+                return None
+            if filepath in self.decks:
+                self.decks.move_to_end(filepath)
+        return deck
+
+    def put(self, filepath: Path, deck: Deck):
+        """Cache a deck that is current with its files, evicting the least recently used decks
+        beyond max_size."""
+        max_size = cache_size() if self.max_size is None else self.max_size
+        if max_size <= 0:
+            return
+        filepath = Path(filepath).resolve()
+        stamp = file_stamp(filepath)
+        with self.lock:
+            self.decks[filepath] = (stamp, deck)
+            self.decks.move_to_end(filepath)
+            while len(self.decks) > max_size:
+                self.decks.popitem(last=False)
+
+    def saved(self, filepath: Path, deck: Deck):
+        """Keep the cache current after *deck* was saved to *filepath*: the cached deck is kept
+        if it is the one saved, and dropped otherwise."""
+        cached = self.discard(filepath)
+        if cached is not None and cached[1] is deck:
+            self.put(filepath, deck)
+
+    def discard(self, filepath: Path):
+        """Stop caching the deck loaded from *filepath*; get its (file stamp, Deck), if cached."""
+        with self.lock:
+            return self.decks.pop(Path(filepath).resolve(), None)
+
+    def clear(self):
+        """Stop caching all decks."""
+        with self.lock:
+            self.decks.clear()
+
+
+def cache_size() -> int:
+    """Get the number of decks to keep loaded, per FLASHCARDS_CACHE_SIZE (0 turns caching off)."""
+    size = os.environ.get(CACHE_SIZE_ENV_VAR, str(DEFAULT_CACHE_SIZE))
+    try:
+        return int(size)
+    except ValueError:
+        raise ValueError(f"Invalid deck cache size '{size}' - use a number of decks.")
+
+
+deck_cache = DeckCache()  # may be set to None to load every deck from its file
+
+
+@contextmanager
+def garbage_collection_paused():
+    """Pause the cyclic garbage collector, which would otherwise scan the objects created so far
+    again and again while a deck's cards are being created."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def keep_backups() -> bool:
+    """Check whether the previous version of a deck file should be kept, per FLASHCARDS_BACKUP."""
+    return os.environ.get(BACKUP_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+
+def backup_path(filepath: Path) -> Path:
+    """Get the path of the backup of a deck file."""
+    filepath = Path(filepath).resolve()
+    return filepath.with_name(filepath.name + BACKUP_EXTENSION)
+
+
+def write_atomically(filepath: Path, data: bytes, backup: bool = False):
+    """Replace the contents of *filepath* with *data*, such that a crash at any point leaves
+    either the old or the new contents in place.
+
+    The data is written and fsynced to a temporary file in the same directory, which is then
+    renamed over *filepath*. If *backup*, the old contents are first kept at backup_path().
+    """
+    import shutil
+    import tempfile
+
+    filepath = Path(filepath).resolve()
+    fd, temp_path = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        profiling.count_bytes(written=len(data))
+
+        # the temporary file is only readable by its owner
+        if filepath.exists():
+            shutil.copymode(filepath, temp_path)
+        else:
+            os.chmod(temp_path, new_file_mode())
+
+        if backup and filepath.exists() and filepath.stat().st_size:
+            make_backup(filepath)
+
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    fsync_directory(filepath.parent)
+
+
+def make_backup(filepath: Path):
+    """Replace the backup of a deck file with its current contents."""
+    import shutil
+
+    backup = backup_path(filepath)
+    temp_backup = backup.with_name(backup.name + ".tmp")
+    if os.path.exists(temp_backup):
+        os.remove(temp_backup)
+
+    # a hard link to the current file costs nothing to make; copy where links aren't supported
+    try:
+        os.link(filepath, temp_backup)
+    except OSError:
+        shutil.copy2(filepath, temp_backup)
+    os.replace(temp_backup, backup)
+
+
+def new_file_mode() -> int:
+    """Get the permissions a file created with open() would have, given the process's umask."""
+    # the umask can only be read by setting it; a restrictive one is set meanwhile, so that files
+    # created by other threads are never given more permissions than they should
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def fsync_directory(path: Path):
+    """Make a rename in the directory *path* durable, where the platform allows it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # e.g. directories can't be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-        with open(self.filepath, "w") as file:
-            json.dump(self.to_dict(), file, indent=4)
+
+def compact_format() -> bool:
+    """Check whether decks should be saved without indentation, per FLASHCARDS_FORMAT."""
+    deck_format = os.environ.get(FORMAT_ENV_VAR, "indented")
+
+    if deck_format not in ("indented", "compact"):
+        raise ValueError(f"Unknown deck format '{deck_format}' - use 'indented' or 'compact'.")
+    return deck_format == "compact"
+
+
+def encode(content, compact: bool = None) -> bytes:
+    """Serialize *content* to UTF-8 json, with orjson if it is installed.
+
+    Unless *compact* (which defaults to the FLASHCARDS_FORMAT setting), the json is indented.
+    """
+    if compact is None:
+        compact = compact_format()
+
+    orjson = get_orjson()
+    if orjson is not None:
+        return orjson.dumps(content, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(content, indent=4).encode("utf-8")
+
+
+def decode(data: bytes):
+    """Deserialize UTF-8 json, with orjson if it is installed.
+
+    Both libraries raise a json.decoder.JSONDecodeError for invalid json.
+    """
+    orjson = get_orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def get_orjson() -> Optional[ModuleType]:
+    """Get the orjson module, importing it the first time, or None if it isn't installed."""
+    global orjson, orjson_imported
+    if not orjson_imported:
+        import importlib
+
+        try:
+            orjson = importlib.import_module("orjson")
+        except ImportError:
+            orjson = None
+        orjson_imported = True
+    return orjson
+
+
+def get_backend():
+    """Get the storage backend named by the FLASHCARDS_BACKEND environment variable."""
+    backend = os.environ.get(BACKEND_ENV_VAR, "json")
+
+    if backend == "json":
+        return JsonBackend()
+    if backend == "sqlite":
+        from flashcards.database import SqliteBackend
+
+        return SqliteBackend()
+    raise ValueError(f"Unknown storage backend '{backend}' - use 'json' or 'sqlite'.")
 
 
 def load_deck(filepath: Path) -> Deck:
-    """Load a json file and create a Deck from it."""
-    with open(filepath, "r") as file:
-        content = json.load(file)
-
-    if "name" not in content:
-        raise KeyError("The deck file is corrupted - deck 'name' key is missing.")
-    if "description" not in content:
-        raise KeyError("The deck file is corrupted - deck 'description' key is missing.")
-    if "cards" not in content:
-        raise KeyError("The deck file is corrupted - deck 'cards' key is missing.")
-    if not isinstance(content["cards"], list):
-        raise ValueError("The deck file is corrupted - 'cards' value should be a list.")
-
-    deck = Deck(content["name"], content["description"])
-    deck.cards = content["cards"]
+    """Load the deck stored at *filepath*."""
+    with profiling.phase("load"):
+        return get_backend().load(filepath)
+
+
+def load_decks(filepaths: list, max_workers: int = None, backend=None) -> list:
+    """Load several decks, reading them concurrently in a pool of threads.
+
+    Return a list of (filepath, result) pairs in the order of *filepaths*, where result is either
+    the Deck or the exception raised while loading it, so that one corrupted deck doesn't keep the
+    others from loading.
+    """
+    if not filepaths:
+        return []
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = get_backend() if backend is None else backend
+
+    def load(filepath):
+        with profiling.phase("load"):
+            try:
+                return backend.load(filepath)
+            except (OSError, KeyError, ValueError) as e:
+                return e
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        results = list(executor.map(load, filepaths))
+    return list(zip(filepaths, results))
+
+
+def load_summary(filepath: Path) -> dict:
+    """Get the name, description and number of cards of the deck stored at *filepath*."""
+    with profiling.phase("scan"):
+        [(_, summary)] = get_backend().load_summaries([filepath])
+    if isinstance(summary, Exception):
+        raise summary
+    return summary
+
+
+def load_summaries(filepaths: list) -> list:
+    """Get the name, description and number of cards of several decks.
+
+    Return a list of (filepath, result) pairs, as load_decks() does.
+    """
+    with profiling.phase("scan"):
+        return get_backend().load_summaries(filepaths)
+
+
+def deck_exists(filepath: Path) -> bool:
+    """Check whether a deck is stored at *filepath*."""
+    return get_backend().exists(filepath)
+
+
+def deck_paths() -> list:
+    """Get the filepaths of all decks."""
+    with profiling.phase("scan"):
+        return get_backend().deck_paths()
+
+
+def append_card(filepath: Path, card: dict):
+    """Add a card to the deck stored at *filepath*, without rewriting the whole deck."""
+    append_cards(filepath, [card])
+
+
+def append_cards(filepath: Path, cards: list):
+    """Add several cards to the deck stored at *filepath* in one write."""
+    assign_card_ids(cards)
+    with profiling.phase("write"):
+        get_backend().append_cards(filepath, cards)
+
+    from flashcards import search
+
+    search.cards_written(filepath, cards)
+
+
+def generate_card_id() -> str:
+    """Generate a unique id for a card."""
+    import uuid
+
+    return uuid.uuid4().hex
+
+
+def assign_card_ids(cards: list) -> bool:
+    """Give an id to each card that doesn't have one; return whether any card was given one."""
+    assigned = False
+    for card in cards:
+        if "id" not in card:
+            card["id"] = generate_card_id()
+            assigned = True
+    return assigned
+
+
+def compact_deck(filepath: Path) -> Deck:
+    """Fold cards added since the deck was last saved back into its storage."""
+    return get_backend().compact(filepath)
+
+
+DECK_FORMAT_EXTENSIONS = {
+    "json": DECK_EXTENSION,
+    "binary": BINARY_DECK_EXTENSION,
+    "sharded": SHARDED_DECK_EXTENSION,
+}
+
+
+def is_binary_deck(filepath: Path) -> bool:
+    """Check whether *filepath* (following the selected deck's link) is a binary deck file."""
+    return Path(filepath).resolve().suffix == BINARY_DECK_EXTENSION
+
+
+def is_large_json_deck(filepath: Path) -> bool:
+    """Check whether *filepath* is a json deck file larger than LARGE_DECK_SIZE."""
+    return (
+        not is_binary_deck(filepath)
+        and not is_sharded_deck(filepath)
+        and os.path.getsize(filepath) > LARGE_DECK_SIZE
+    )
+
+
+def is_sharded_deck(filepath: Path) -> bool:
+    """Check whether *filepath* (following the selected deck's link) is a sharded deck."""
+    return Path(filepath).resolve().suffix == SHARDED_DECK_EXTENSION
+
+
+def convert_deck(filepath: Path, deck_format: str, shard_size: int = None) -> Deck:
+    """Rewrite a deck stored in a file (or directory) in another format ("json", "binary" or
+    "sharded", into shards of *shard_size* cards), removing the old file.
+
+    The selected deck's link is updated if it pointed to the old file.
+    """
+    backend = JsonBackend()
+    old_path = Path(filepath).resolve()
+    new_path = old_path.with_suffix(DECK_FORMAT_EXTENSIONS[deck_format])
+
+    deck = backend.load(old_path)
+    if new_path == old_path:
+        return deck
+
+    deck.cards = list(deck.cards)
+    deck.filepath = new_path
+    if deck_format == "sharded":
+        from flashcards import shards
+
+        shards.create(new_path, deck, shard_size or shards.DEFAULT_SHARD_SIZE)
+    backend.save(deck)
+    if old_path.is_dir():
+        import shutil
+
+        shutil.rmtree(old_path)
+    else:
+        old_path.unlink()
+    if deck_cache is not None:
+        deck_cache.discard(old_path)
+
+    index = read_index()
+    if index.pop(old_path.name, None) is not None:
+        write_index(index)
+
+    selected = selected_deck_path()
+    if selected.is_symlink() and selected.resolve() == old_path:
+        link_selected_deck(new_path)
     return deck
 
 
+def journal_path(filepath: Path) -> Path:
+    """Get the path of the append-only journal that sits next to a deck file."""
+    return Path(filepath).resolve().with_suffix(JOURNAL_EXTENSION)
+
+
+def index_path() -> Path:
+    """Get the absolute path of the deck index, which holds a summary of each json deck."""
+    return storage_path() / INDEX_NAME
+
+
+def read_index() -> dict:
+    """Get the deck index, keyed by deck filename; an unreadable index is treated as empty."""
+    try:
+        with open(index_path(), "rb") as file:
+            data = file.read()
+        profiling.count_bytes(read=len(data))
+        return decode(data)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        return {}
+
+
+def write_index(index: dict):
+    """Save the deck index."""
+    write_atomically(index_path(), encode(index, compact=True))
+
+
+def file_stamp(filepath: Path) -> dict:
+    """Get the modification times and sizes of a deck file (or a sharded deck's manifest, which
+    every save rewrites) and its journal."""
+    deck_file = filepath
+    if is_sharded_deck(filepath):
+        deck_file = Path(filepath) / SHARD_MANIFEST_NAME
+    deck_stat = os.stat(deck_file)
+    try:
+        journal_stat = os.stat(journal_path(filepath))
+    except FileNotFoundError:
+        journal_mtime, journal_size = None, 0
+    else:
+        journal_mtime, journal_size = journal_stat.st_mtime_ns, journal_stat.st_size
+
+    return {
+        "mtime": deck_stat.st_mtime_ns,
+        "size": deck_stat.st_size,
+        "journal_mtime": journal_mtime,
+        "journal_size": journal_size,
+    }
+
+
+def earliest_due(cards) -> Optional[float]:
+    """Get the earliest time any of *cards* is due (0 for a card not studied yet), or None if
+    there are no cards."""
+    return min((card.get("due", 0) for card in cards), default=None)
+
+
+def index_next_due(deck: Deck) -> dict:
+    """Get the "next_due" field of the deck index entry of *deck*, if it can be known without
+    decoding every card: binary deck files record it, and sharded decks don't have it."""
+    if is_sharded_deck(deck.filepath):  # it would mean reading every shard
+        return {}
+    if is_binary_deck(deck.filepath) and not isinstance(deck.cards, list):
+        return deck.cards.next_due()
+    return {"next_due": earliest_due(deck.cards)}
+
+
+def next_due_times(filepaths: list) -> list:
+    """Get, for each deck, a time before which none of its cards are due, per the deck index, or
+    None if the index doesn't know (e.g. the deck has changed since it was indexed)."""
+    if not isinstance(get_backend(), JsonBackend):
+        return [None] * len(filepaths)
+
+    index = read_index()
+    times = []
+    for filepath in filepaths:
+        filepath = Path(filepath).resolve()
+        entry = index.get(filepath.name, {})
+        try:
+            current = index_entry_is_current(entry, file_stamp(filepath))
+        except OSError:
+            current = False
+        times.append(entry.get("next_due") if current else None)
+    return times
+
+
+def index_entry_is_current(entry: Optional[dict], stamp: dict) -> bool:
+    """Check whether a deck index entry was made from the files described by *stamp*."""
+    if entry is None:
+        return False
+    return all(entry.get(key) == value for key, value in stamp.items())
+
+
+def read_journal(filepath: Path) -> list:
+    """Get the cards recorded in the deck's journal, if any, in the order they were added."""
+    journal = journal_path(filepath)
+    if not journal.exists():
+        return []
+
+    cards = []
+    with open(journal, "rb") as file:
+        for line in file:
+            profiling.count_bytes(read=len(line))
+            # a line without a newline is an append that was interrupted; ignore it
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                cards.append(decode(line))
+    return cards
+
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class DeckFileReader:
+    """Read a json deck file a piece at a time, so that it is never all in memory at once.
+
+    fields() yields the top-level fields of the file as they are read, and cards one at a time,
+    with the same checks of the deck's keys as loading the whole file makes.
+    """
+
+    CHUNK_SIZE = 64 * 1024  # characters
+
+    def __init__(self, file):
+        self.file = file  # opened in text mode
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        """Read more of the file into the buffer, or return False at the end of the file.
+
+        As much is read as is buffered already, so that a value that takes many reads (e.g. a
+        long string) is parsed again only a few times.
+        """
+        chunk = self.file.read(max(self.CHUNK_SIZE, len(self.buffer) - self.position))
+        if not chunk:
+            return False
+        profiling.count_bytes(read=len(chunk))  # characters, which are mostly single bytes
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self) -> str:
+        """Get the next character that isn't whitespace, without reading past it, or "" at the
+        end of the file."""
+        while True:
+            match = WHITESPACE.match(self.buffer, self.position)
+            assert match is not None  # which it never is, as the pattern matches ""
+            self.position = match.end()
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position : self.position + 1]
+
+    def expect(self, chars: str) -> str:
+        """Read the next character, which should be one of *chars*."""
+        char = self.next_char()
+        if not char or char not in chars:
+            expected = " or ".join(repr(c) for c in chars)
+            raise json.decoder.JSONDecodeError(f"Expecting {expected}", self.buffer, self.position)
+        self.position += 1
+        return char
+
+    def value(self):
+        """Read the next json value."""
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.decoder.JSONDecodeError:
+                if self.fill():  # the value may just continue past the buffer
+                    continue
+                raise
+            if end == len(self.buffer) and self.fill():  # e.g. a number cut off by the buffer
+                continue
+            self.position = end
+            return value
+
+    def fields(self):
+        """Yield the (key, value) pairs of the deck's object in file order; the value of "cards"
+        is an iterator over the cards, and whichever of them aren't used are skipped."""
+        self.expect("{")
+        keys = set()
+        if self.next_char() == "}":
+            self.position += 1
+        else:
+            while True:
+                key = self.value()
+                self.expect(":")
+                keys.add(key)
+                if key == "cards":
+                    if self.next_char() != "[":
+                        raise ValueError(
+                            "The deck file is corrupted - 'cards' value should be a list."
+                        )
+                    cards = self.cards()
+                    yield key, cards
+                    for _ in cards:
+                        pass
+                else:
+                    yield key, self.value()
+                if self.expect(",}") == "}":
+                    break
+        if self.next_char():
+            raise json.decoder.JSONDecodeError("Extra data", self.buffer, self.position)
+
+        for key in ("name", "description", "cards"):
+            if key not in keys:
+                raise KeyError(f"The deck file is corrupted - deck '{key}' key is missing.")
+
+    def cards(self):
+        """Yield the cards of the list that starts at the next character."""
+        self.expect("[")
+        if self.next_char() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def stream_summary(filepath: Path) -> dict:
+    """Get the name, description and number of cards of a json deck by reading its file a piece
+    at a time, counting its cards (and the new cards in its journal) without keeping them."""
+    journal = read_journal(filepath)
+    journaled_ids = {card["id"] for card in journal if "id" in card}
+    in_file = set()  # journaled ids of cards in the file, whose journaled versions are edits
+    summary = {"count": 0}
+
+    with open(filepath, encoding="utf-8") as file:
+        for key, value in DeckFileReader(file).fields():
+            if key == "cards":
+                for card in value:
+                    summary["count"] += 1
+                    if journaled_ids and card.get("id") in journaled_ids:
+                        in_file.add(card["id"])
+            elif key in ("name", "description"):
+                summary[key] = value
+
+    # the rest of the journal is new cards, and maybe later edits of them
+    new_ids = set()
+    for card in journal:
+        card_id = card.get("id")
+        if card_id is None or (card_id not in in_file and card_id not in new_ids):
+            summary["count"] += 1
+            new_ids.add(card_id)
+    return summary
+
+
+def iter_deck_cards(filepath: Path):
+    """Get the cards of a deck to go through once: those of a json deck that isn't cached are read
+    from its file a piece at a time, rather than loading the deck whole."""
+    if (
+        isinstance(get_backend(), JsonBackend)
+        and not is_binary_deck(filepath)
+        and not is_sharded_deck(filepath)
+    ):
+        deck = None if deck_cache is None else deck_cache.get(filepath)
+        if deck is not None:
+            return deck.cards
+        os.stat(filepath)  # a missing deck raises an error now, rather than once cards are read
+        return stream_cards(filepath)
+    return load_deck(filepath).cards
+
+
+def stream_cards(filepath: Path):
+    """Yield the cards of a json deck one at a time as its file is read, with the edits and new
+    cards of its journal (which is read whole, being small) applied."""
+    journaled: dict = {}  # id -> card, with any later edits of it; in the order first journaled
+    unidentified = []
+    for card in read_journal(filepath):
+        if "id" not in card:
+            unidentified.append(card)
+        elif card["id"] in journaled:
+            journaled[card["id"]].update(card)
+        else:
+            journaled[card["id"]] = card
+
+    with open(filepath, encoding="utf-8") as file:
+        for key, value in DeckFileReader(file).fields():
+            if key == "cards":
+                for card in value:
+                    if journaled and "id" in card and card["id"] in journaled:
+                        card.update(journaled.pop(card["id"]))
+                    yield card
+    yield from journaled.values()  # the new cards
+    yield from unidentified
+
+
 def storage_path() -> Path:
     """Get the absolute storage path on the machine."""
     return Path.home() / STORAGE_DIR_NAME
@@ -86,7 +1212,7 @@ def name_starts_with_non_letter(name) -> bool:
 
 def file_would_be_duplicate(name) -> bool:
     """Helper function to enable easier testing."""
-    return generate_deck_filepath(name).exists()
+    return deck_exists(generate_deck_filepath(name))
 
 
 def deck_name_is_all(name) -> bool:
@@ -125,9 +1251,17 @@ def generate_stem(string: str) -> str:
 
 
 def generate_deck_filepath(deck_name: str) -> Path:
-    """Generate the absolute filepath in which the given deck should be stored."""
-    filename = generate_stem(deck_name) + DECK_EXTENSION
-    return storage_path() / filename
+    """Generate the absolute filepath in which the given deck should be stored.
+
+    This is the deck's json file, unless the deck has been converted to a binary file or to a
+    sharded deck.
+    """
+    stem = generate_stem(deck_name)
+    for extension in (BINARY_DECK_EXTENSION, SHARDED_DECK_EXTENSION):
+        filepath = storage_path() / (stem + extension)
+        if filepath.exists():
+            return filepath
+    return storage_path() / (stem + DECK_EXTENSION)
 
 
 def selected_deck_path() -> Path:
@@ -1,15 +1,34 @@
 import os
+import re
 from subprocess import run
 import tempfile
 
 import click
 
+from flashcards import profiling
 from flashcards.decks import generate_deck_filepath, load_deck
-from flashcards.exceptions import NoEditsMadeException, InstructionsRemovedException
+from flashcards.exceptions import (
+    BatchFormatException,
+    NoEditsMadeException,
+    InstructionsRemovedException,
+)
 
 Q_INSTRUCTION = "# Edit the question above. Do not edit or remove this line."
 A_INSTRUCTION = "# Edit the answer above. Do not edit or remove this line."
 
+# the lines after the question and the answer of each card, when editing many cards at once
+CARD_INSTRUCTION = "# Edit the {field} of card {card_id} above. Do not edit or remove this line."
+CARD_INSTRUCTION_PATTERN = re.compile(
+    r"# Edit the (question|answer) of card (\S+) above\. Do not edit or remove this line\."
+)
+
+ANSWER_DELIMITER = "---"  # line between the question and the answer of a card
+CARD_DELIMITER = "==="  # line between cards
+BATCH_INSTRUCTIONS = f"""
+# Write cards above, as many as you like: the question, a line of "{ANSWER_DELIMITER}", then the
+# answer, with a line of "{CARD_DELIMITER}" between cards. Lines starting with "#" are ignored.
+"""
+
 
 def prompt_via_editor(instructions: str) -> str:
     """Open a temporary file with user's editor, with *instructions* written into it, and return
@@ -17,7 +36,7 @@ def prompt_via_editor(instructions: str) -> str:
     """
     editor = os.environ.get("EDITOR", "vim")  # default to vim
 
-    with tempfile.NamedTemporaryFile(mode="r+") as f:
+    with profiling.phase("editor"), tempfile.NamedTemporaryFile(mode="r+") as f:
         f.write(instructions)
         f.flush()
         run([editor, f.name])  # call the editor to open this file.
@@ -74,3 +93,66 @@ def edit_card(card: dict) -> dict:
         edited_answer.append(line)
 
     return {"question": "\n".join(edited_question), "answer": "\n".join(edited_answer)}
+
+
+def parse_cards(content: str) -> list:
+    """Get the cards written in *content* (see BATCH_INSTRUCTIONS), as dicts with a question and
+    an answer."""
+    cards: list = []
+    fields: list = [[]]  # lines of the question, and of the answer once past the answer delimiter
+    for line in content.splitlines() + [CARD_DELIMITER]:
+        if line.startswith("#"):
+            continue
+        if line.strip() == CARD_DELIMITER:
+            card = ["\n".join(lines).strip() for lines in fields]
+            if card != [""]:  # nothing between two delimiters
+                if len(card) != 2 or not all(card):
+                    raise BatchFormatException(
+                        f"Card {len(cards) + 1} has no question or no answer."
+                    )
+                cards.append({"question": card[0], "answer": card[1]})
+            fields = [[]]
+        elif line.strip() == ANSWER_DELIMITER and len(fields) == 1:
+            fields.append([])
+        else:
+            fields[-1].append(line)
+    return cards
+
+
+def edit_cards(cards: list) -> list:
+    """Edit the questions and answers of several cards in one editor, and return the changed ones
+    as (card, edited question and answer) pairs."""
+    expected = []  # the instruction lines, in order
+    filecontents = ""
+    for card in cards:
+        for field in ("question", "answer"):
+            instruction = CARD_INSTRUCTION.format(field=field, card_id=card["id"])
+            filecontents += card[field] + "\n" + instruction + "\n"
+            expected.append(instruction)
+
+    edited_filecontents = prompt_via_editor(filecontents)
+
+    if edited_filecontents == filecontents:
+        raise NoEditsMadeException
+
+    # the text before each instruction line (and after the previous one) is what it is about
+    instructions = []
+    texts = []
+    text: list = []
+    for line in edited_filecontents.split("\n"):
+        if CARD_INSTRUCTION_PATTERN.fullmatch(line):
+            instructions.append(line)
+            texts.append("\n".join(text))
+            text = []
+        else:
+            text.append(line)
+
+    if instructions != expected:
+        raise InstructionsRemovedException
+
+    edited = []
+    for i, card in enumerate(cards):
+        fields = {"question": texts[2 * i], "answer": texts[2 * i + 1]}
+        if fields != {"question": card["question"], "answer": card["answer"]}:
+            edited.append((card, fields))
+    return edited
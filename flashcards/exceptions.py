@@ -8,3 +8,11 @@ class NoEditsMadeException(FlashcardsException):
 
 class InstructionsRemovedException(FlashcardsException, ValueError):
     pass
+
+
+class ImportFileException(FlashcardsException, ValueError):
+    pass
+
+
+class BatchFormatException(FlashcardsException, ValueError):
+    pass
@@ -1,37 +1,106 @@
-"""Main entry point of the application, with commands and sub-commands."""
-import json
-import os
-import random
+"""
+Main entry point of the application, with commands and sub-commands.
 
+To keep startup fast (e.g. for "flashcards status" in a shell prompt), modules that only some
+commands need are imported within those commands.
+"""
 import click
 
 from flashcards import decks
-from flashcards.editor import edit_card, prompt_via_editor, remove_instructions
-from flashcards.exceptions import NoEditsMadeException, InstructionsRemovedException
+
+
+def echo_load_error(deck_path, error: Exception):
+    """Tell the user that a deck couldn't be loaded because its file is corrupted."""
+    import json
+
+    if isinstance(error, json.decoder.JSONDecodeError):
+        click.echo(f"  Problem loading deck in file {deck_path.name}; ignored.")
+    elif isinstance(error, KeyError):
+        click.echo(error)
+    elif isinstance(error, ValueError):  # e.g. the cards aren't a list
+        click.echo(f"  Problem loading deck in file {deck_path.name}; ignored. {error}")
+    else:
+        raise error
+
+
+def count_cards(deck: str):
+    """Get the paths of the decks to study (DECK of "flashcards study") and how many cards each
+    has, without loading them, or None (after telling the user why) if there is nothing to study."""
+    if deck == "all":
+        deck_paths = []
+        counts = []
+        for deck_path, summary in decks.load_summaries(decks.deck_paths()):
+            if isinstance(summary, Exception):
+                echo_load_error(deck_path, summary)
+                continue
+            deck_paths.append(deck_path)
+            counts.append(summary["count"])
+        if not sum(counts):
+            click.echo("There are no cards to study.")
+            return None
+    else:
+        if deck:
+            deck_path = decks.generate_deck_filepath(deck)
+        else:
+            deck_path = decks.selected_deck_path()
+
+        try:
+            summary = decks.load_summary(deck_path)
+        except IOError:
+            click.echo("No deck by that name found." if deck else "No deck currently selected.")
+            return None
+
+        if not summary["count"]:
+            click.echo(f"The {summary['name']} deck currently has no cards.")
+            return None
+
+        deck_paths = [deck_path]
+        counts = [summary["count"]]
+
+    return deck_paths, counts
 
 
 @click.group()
-def cli():
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar="FLASHCARDS_PROFILE",
+    help="Print how long each phase of the command took, and the bytes it read and wrote.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="FLASHCARDS_PROFILE_OUTPUT",
+    help="Also save a trace of the phases (a .json file) or cProfile stats (any other file).",
+)
+@click.pass_context
+def cli(ctx, profile, profile_output):
     """
     Create and study flashcards on the command line.
 
     For additional help, run a command below with the --help option or visit https://github.com/kdwarn/flashcards.
     """
-    decks.create_storage_directory()  # create it if it doesn't already exist
+    from flashcards import profiling
+
+    if (profile or profile_output) and profiling.profile is None:  # e.g. not within the shell
+        profiling.start(profile_output)
+        ctx.call_on_close(lambda: click.echo(profiling.stop().report(), err=True))
+    # the storage directory is created by the commands that create decks, so that the commands
+    # that only read don't pay for it
 
 
 @cli.command("status")
 def status_cmd():
     """Show details about selected deck, if any."""
     try:
-        deck = decks.load_deck(decks.selected_deck_path())
+        summary = decks.load_summary(decks.selected_deck_path())
     except IOError:
         return click.echo("No deck currently selected.")
 
-    click.echo(f"\nCurrently selected deck: {deck.name}")
-    click.echo(f"Number of cards: {len(deck.cards)}")
-    if deck.description:
-        click.echo(f"Description: {deck.description}")
+    click.echo(f"\nCurrently selected deck: {summary['name']}")
+    click.echo(f"Number of cards: {summary['count']}")
+    if summary["description"]:
+        click.echo(f"Description: {summary['description']}")
     click.echo("")
 
 
@@ -43,92 +112,142 @@ def status_cmd():
     is_flag=True,
     help="Study the cards in the order they were added to the deck.",
 )
-def study_cmd(deck, ordered):
+@click.option(
+    "--due",
+    is_flag=True,
+    help="Only study the cards that are due for review, most overdue first.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    help="Shuffle the cards the same way as other sessions with this seed (and the same decks).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue the last session that was quit before its end, where it was left.",
+)
+def study_cmd(deck, ordered, due, seed, resume):
     """
     Start a study session. By default, the cards are shuffled.
 
     If DECK is not provided, study the selected deck, if any.
 
     Use "flashcards study all" to study cards from all decks.
-    """
-    # load decks (one or all), add deck name to each card to enable editing
-    if deck == "all":
-        cards = []
-        for deck_path in decks.storage_path().iterdir():
-            if deck_path.suffix == ".json":
-                deck = decks.load_deck(deck_path)
-
-                for card in deck.cards:
-                    card["deck"] = deck.name
-                    cards.append(card)
-        if not cards:
-            return click.echo("There are no cards to study.")
-    else:
-        if not deck:
-            try:
-                deck = decks.load_deck(decks.selected_deck_path()).name
-            except IOError:
-                return click.echo("No deck currently selected.")
 
-        deck_path = decks.generate_deck_filepath(deck)
+    After each answer, grade how well you remembered it from 1 (not at all) to 4 (easily) to
+    schedule the card's next review; "flashcards study --due" then shows only the cards that are
+    due.
 
-        try:
-            deck = decks.load_deck(deck_path)
-        except IOError:
-            return click.echo("No deck by that name found.")
-
-        if not deck.cards:
-            return click.echo(f"The {deck.name} deck currently has no cards.")
-
-        cards = deck.cards
-
-        for card in cards:
-            card["deck"] = deck.name
+    A session that is quit (or interrupted) before its end can be picked up where it was left with
+    "flashcards study --resume".
+    """
+    from contextlib import nullcontext
+
+    from flashcards import study
+    from flashcards.editor import edit_card
+    from flashcards.exceptions import NoEditsMadeException, InstructionsRemovedException
+
+    # decks are counted, not loaded; they are loaded as their cards come up
+    session = None
+    if resume:
+        if deck or ordered or due or seed is not None:
+            raise click.UsageError(
+                "--resume continues the last session as it was; it takes no other options."
+            )
+        session = study.Session.load()
+        if session is None:
+            return click.echo("There is no study session to resume.")
+        changed = session.changed_decks()
+        for deck_path, count, now in changed:
+            if now is None:
+                click.echo(f"The deck {deck_path} of the session can't be read anymore.")
+            else:
+                click.echo(
+                    f"The deck {deck_path} had {count} cards when the session began; now {now}."
+                )
+        if changed:
+            return click.echo("The session can't be resumed. Start a new one instead.")
+    else:
+        counted = count_cards(deck)
+        if counted is None:
+            return
+        deck_paths, counts = counted
+
+    if due:
+        queue = study.due_queue(deck_paths)
+        if not queue:
+            return click.echo("There are no cards due for review.")
+        question_num = len(queue)
+        cards = study.iter_queue(queue)
+        first_num = 1
+    else:
+        if session is None:
+            session = study.Session(deck_paths, counts, ordered, seed)
+        question_num = len(session)
+        cards = session.cards()
+        first_num = session.position + 1
+
+    # study - iterate through cards, pausing for user input after each question/answer. Grades and
+    # edits are written in batches whenever the session ends, and then the session is saved.
+
+    saving = nullcontext() if session is None else session
+    with saving, study.PendingEdits() as edits:
+        for i, (deck, card) in enumerate(cards, start=first_num):
+            click.clear()
+            click.echo(f"QUESTION {i} / {question_num} ({deck.name} deck)")
+            click.echo("\n" + card["question"] + "\n")
+            click.pause("...")
+            click.echo("\n" + card["answer"] + "\n")
+            click.secho(
+                "Press 1-4 to grade your answer (1: forgot, 4: easy), 'e' to edit this question, "
+                "'q' to quit, and any other key to show the next question.",
+                fg="green",
+            )
+            key_press = click.getchar()  # note that this also acts as a pause
+
+            if key_press == "q":
+                return
+            if key_press in study.GRADES:
+                edits.update_card(deck, card, **study.schedule(card, study.GRADES[key_press]))
+            if key_press == "e":
+                try:
+                    edited_card = edit_card(card)
+                except NoEditsMadeException:
+                    click.echo("No edits detected; card not edited.")
+                except InstructionsRemovedException:
+                    click.echo("Unable to edit card - an instruction line was edited or deleted.")
+                else:
+                    edits.update_card(deck, card, **edited_card)
+                    click.echo("Card edited.")
+
+                click.pause()
 
-    if not ordered:
-        random.shuffle(cards)
+    click.echo("All done!")
 
-    # study - iterate through cards, pausing for user input after each question/answer.
-    question_num = len(cards)
 
-    for i, card in enumerate(cards, start=1):
-        click.clear()
-        click.echo(f"QUESTION {i} / {question_num} ({card['deck']} deck)")
-        click.echo("\n" + card["question"] + "\n")
-        click.pause("...")
-        click.echo("\n" + card["answer"] + "\n")
-        click.secho(
-            "Press 'e' to edit this question, 'q' to quit, and any other key to show the next question.",
-            fg="green",
-        )
-        key_press = click.getchar()  # note that this also acts as a pause
+@cli.command("search")
+@click.argument("query", nargs=-1, required=True)
+@click.option("-n", "--limit", default=20, show_default=True, help="The most cards to show.")
+def search_cmd(query, limit):
+    """
+    Search the questions and answers of all decks.
 
-        if key_press == "q":
-            return
-        if key_press == "e":
-            try:
-                edited_card = edit_card(card)
-            except NoEditsMadeException:
-                click.echo("No edits detected; card not edited.")
-            except InstructionsRemovedException:
-                click.echo("Unable to edit card - an instruction line was edited or deleted.")
-            else:
-                deck_path = decks.generate_deck_filepath(card["deck"])
-                deck = decks.load_deck(deck_path)
+    Each word of QUERY matches words that start with it, so "mult tab" finds "multiplication
+    table". The best matches are shown first.
+    """
+    from textwrap import indent
 
-                for deck_card in deck.cards:
-                    if (
-                        deck_card["question"] == card["question"]
-                        and deck_card["answer"] == card["answer"]
-                    ):
-                        deck_card["question"] = edited_card["question"]
-                        deck_card["answer"] = edited_card["answer"]
-                deck.save()
-                click.echo("Card edited.")
+    from flashcards import search
 
-            click.pause()
+    results = search.search(" ".join(query), limit)
+    if not results:
+        return click.echo("No cards found.")
 
-    click.echo("All done!")
+    for deck_name, question, answer in results:
+        click.echo(f"\n{deck_name}: {question}")
+        click.echo(indent(answer, "    "))
+    click.echo("")
 
 
 @cli.command("create")
@@ -136,6 +255,7 @@ def study_cmd(deck, ordered):
 @click.option("--desc", prompt="Description of the deck")
 def create(name, desc):
     """Create a new deck."""
+    decks.create_storage_directory()  # create it if it doesn't already exist
     deck = decks.Deck(name, desc)
     deck.create_file()
     deck.save()
@@ -161,25 +281,19 @@ def select(deck):
 @cli.command("list")
 def list_decks():
     """List all decks."""
-    storage_dir = decks.storage_path()
-    deck_paths = list(storage_dir.glob("**/*.json"))
+    deck_paths = decks.deck_paths()
     if not deck_paths:
         click.echo("You don't have any decks yet.")
     else:
         click.echo("\nYour decks:")
-        for deck_path in sorted(deck_paths):
-            try:
-                deck = decks.load_deck(deck_path)
-            except json.decoder.JSONDecodeError:
-                click.echo(f"  Problem loading deck in file {deck_path.name}; ignored.")
+        for deck_path, summary in decks.load_summaries(deck_paths):
+            if isinstance(summary, Exception):
+                echo_load_error(deck_path, summary)
                 continue
-            except KeyError as e:
-                click.echo(e)
-                continue
-            click.echo(f"  {deck.name} ", nl=False)
-            click.echo(f"({str(len(deck.cards))} cards)", nl=False)
-            if deck.description:
-                click.echo(f": {deck.description}")
+            click.echo(f"  {summary['name']} ", nl=False)
+            click.echo(f"({str(summary['count'])} cards)", nl=False)
+            if summary["description"]:
+                click.echo(f": {summary['description']}")
             else:
                 click.echo("")
         click.echo("")
@@ -192,32 +306,349 @@ def list_decks():
     is_flag=True,
     help="Use an editor rather than the command line to create the card.",
 )
-def add(editormode):
-    """ Add a card to the currently selected deck. """
-    try:
-        deck = decks.load_deck(decks.selected_deck_path())
-    except IOError:
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="Add many cards at once, read from standard input or, with -e, written in one editor.",
+)
+@click.pass_obj
+def add(obj, editormode, batch):
+    """
+    Add a card to the currently selected deck.
+
+    With --batch, cards are written as a question, a line of "---", then the answer, with a line
+    of "===" between cards; lines starting with "#" are ignored.
+    """
+    deck_path = decks.selected_deck_path()
+    if not decks.deck_exists(deck_path):
         return click.echo("No deck is currently selected. Select a deck to add a card.")
 
+    if batch and not editormode and obj and obj.get("shell"):
+        # the shell reads its commands from standard input, so the cards can't be read from there
+        return click.echo("In the shell, use add --batch -e to write the cards in an editor.")
+
+    if batch:
+        from flashcards.editor import BATCH_INSTRUCTIONS, parse_cards
+        from flashcards.exceptions import BatchFormatException
+
     if editormode:
+        from flashcards.editor import prompt_via_editor, remove_instructions
+
         try:
-            question = prompt_via_editor("\n# Write your question above.")
-            question = remove_instructions(question).strip()
-            if not question:
-                return click.echo("Card not added - no question entered.")
-            answer = prompt_via_editor("\n# Write your answer above.")
-            answer = remove_instructions(answer).strip()
-            if not answer:
-                return click.echo("Card not added - no answer entered.")
+            if batch:
+                content = prompt_via_editor(BATCH_INSTRUCTIONS)
+            else:
+                question = prompt_via_editor("\n# Write your question above.")
+                question = remove_instructions(question).strip()
+                if not question:
+                    return click.echo("Card not added - no question entered.")
+                answer = prompt_via_editor("\n# Write your answer above.")
+                answer = remove_instructions(answer).strip()
+                if not answer:
+                    return click.echo("Card not added - no answer entered.")
         except FileNotFoundError:
             return click.echo(
                 "Could not open an editor. Set the EDITOR environment variable to the name "
                 "of your editor or install Vim."
             )
+    elif batch:
+        with click.open_file("-") as stdin:
+            content = stdin.read()
     else:
         question = click.prompt("Question")
         answer = click.prompt("Answer")
 
-    deck.cards.append({"question": question, "answer": answer})
-    deck.save()
+    if batch:
+        try:
+            cards = parse_cards(content)
+        except BatchFormatException as e:
+            return click.echo(f"{e} No cards added.")
+        if not cards:
+            return click.echo("No cards added - none entered.")
+        # all of the cards go into the deck's journal in a single write
+        decks.append_cards(deck_path, cards)
+        return click.echo(f"{len(cards)} cards added to the deck!")
+
+    # the card goes into the deck's journal, so the deck file isn't loaded or rewritten
+    decks.append_card(deck_path, {"question": question, "answer": answer})
     click.echo("Card added to the deck!")
+
+
+@cli.command("edit")
+@click.argument("deck", default="")
+@click.option(
+    "--match",
+    "pattern",
+    help="Only edit the cards whose question or answer matches this regular expression.",
+)
+def edit_cmd(deck, pattern):
+    """
+    Edit the cards of a deck, all in one editor.
+
+    If DECK is not provided, edit the selected deck, if any.
+    """
+    import re
+
+    from flashcards.editor import edit_cards
+    from flashcards.exceptions import NoEditsMadeException, InstructionsRemovedException
+
+    try:
+        pattern = re.compile(pattern or "")
+    except re.error as e:
+        return click.echo(f"Invalid pattern - {e}.")
+
+    deck_path = decks.generate_deck_filepath(deck) if deck else decks.selected_deck_path()
+    try:
+        deck_obj = decks.load_deck(deck_path)
+    except IOError:
+        if not deck:
+            return click.echo("No deck currently selected.")
+        return click.echo("No deck by that name found.")
+
+    cards = [
+        card
+        for card in deck_obj.cards
+        if pattern.search(card["question"]) or pattern.search(card["answer"])
+    ]
+    if not cards:
+        return click.echo("No cards to edit.")
+
+    try:
+        edited = edit_cards(cards)
+    except FileNotFoundError:
+        return click.echo(
+            "Could not open an editor. Set the EDITOR environment variable to the name "
+            "of your editor or install Vim."
+        )
+    except NoEditsMadeException:
+        return click.echo("No edits detected; no cards edited.")
+    except InstructionsRemovedException:
+        return click.echo("Unable to edit cards - an instruction line was edited or deleted.")
+
+    if not edited:
+        return click.echo("No edits detected; no cards edited.")
+
+    # only the changed cards are written, all at once
+    for card, fields in edited:
+        card.update(fields)
+    deck_obj.write_cards([card for card, _ in edited])
+    click.echo(f"{len(edited)} cards edited.")
+
+
+@cli.command("import")
+@click.argument("deck")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "tsv", "jsonl", "anki"]),
+    help="The format of FILE; by default, guessed from its extension.",
+)
+def import_cmd(deck, file, file_format):
+    """
+    Add the cards in FILE to DECK.
+
+    FILE can be CSV or TSV (a question column and an answer column), JSON Lines (an object with a
+    "question" and an "answer" per line), or a "Notes in Plain Text" export from Anki (.txt). Use
+    "-" to read from standard input.
+    """
+    from flashcards import transfer
+    from flashcards.exceptions import ImportFileException
+
+    deck_path = decks.generate_deck_filepath(deck)
+    if not decks.deck_exists(deck_path):
+        return click.echo("No deck by that name found.")
+
+    file_format = file_format or transfer.format_from_filename(file)
+    if file_format is None:
+        return click.echo("Unknown file format - use the --format option.")
+
+    # cards are added to the deck's journal a chunk at a time, so the file isn't held in memory;
+    # json decks are then loaded and saved once, to fold the journal into the deck file
+    imported = 0
+    chunk = []
+    with click.open_file(file, encoding="utf-8-sig") as lines:
+        try:
+            for card in transfer.read_cards(lines, file_format):
+                chunk.append(card)
+                if len(chunk) == transfer.CHUNK_SIZE:
+                    decks.append_cards(deck_path, chunk)
+                    imported += len(chunk)
+                    chunk = []
+        except ImportFileException as e:
+            click.echo(f"{e} Import stopped there.")
+    if chunk:
+        decks.append_cards(deck_path, chunk)
+        imported += len(chunk)
+
+    if imported and isinstance(decks.get_backend(), decks.JsonBackend):
+        decks.compact_deck(deck_path)
+    click.echo(f"Imported {imported} cards.")
+
+
+@cli.command("export")
+@click.argument("deck", default="")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "tsv", "jsonl", "anki"]),
+    help="The format to write; by default, guessed from the output's extension, or CSV.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("w", encoding="utf-8"),
+    default="-",
+    help="The file to write to (default: standard output).",
+)
+def export_cmd(deck, file_format, output):
+    """
+    Write the cards of a deck to a file, in a format other apps can read.
+
+    If DECK is not provided, export the selected deck, if any.
+    """
+    from flashcards import transfer
+
+    deck_path = decks.generate_deck_filepath(deck) if deck else decks.selected_deck_path()
+    try:
+        cards = decks.iter_deck_cards(deck_path)  # json decks are read as they're written out
+    except IOError:
+        if not deck:
+            return click.echo("No deck currently selected.")
+        return click.echo("No deck by that name found.")
+
+    file_format = file_format or transfer.format_from_filename(output.name) or "csv"
+    transfer.write_cards(cards, output, file_format)
+
+
+@cli.command("compact")
+@click.argument("deck", default="")
+def compact(deck):
+    """
+    Fold cards added since the last save back into the deck file.
+
+    If DECK is not provided, compact the selected deck, if any. Use "flashcards compact all" to
+    compact every deck.
+    """
+    if deck == "all":
+        deck_paths = decks.deck_paths()
+    elif deck:
+        deck_paths = [decks.generate_deck_filepath(deck)]
+    else:
+        deck_paths = [decks.selected_deck_path()]
+
+    for deck_path in deck_paths:
+        try:
+            deck_obj = decks.compact_deck(deck_path)
+        except IOError:
+            if not deck:
+                return click.echo("No deck currently selected.")
+            return click.echo("No deck by that name found.")
+        except (KeyError, ValueError) as e:  # a corrupted deck; the others are still compacted
+            echo_load_error(deck_path, e)
+            continue
+        click.echo(f"Compacted deck: {deck_obj.name}")
+
+
+@cli.command("convert")
+@click.argument("deck", default="")
+@click.option(
+    "--to",
+    "deck_format",
+    type=click.Choice(list(decks.DECK_FORMAT_EXTENSIONS)),
+    default="binary",
+    help="The format to store the deck in (default: binary).",
+)
+@click.option(
+    "--shard-size",
+    type=click.IntRange(min=1),
+    help="The most cards in each shard of a sharded deck (default: 10000).",
+)
+def convert(deck, deck_format, shard_size):
+    """
+    Store a deck in a binary file, in a directory of shards, or back in a json file.
+
+    Cards of a binary deck are read from the file only as they are needed, so large decks open
+    quickly and use little memory. A sharded deck is split into files of a fixed number of cards,
+    which are read only as their cards are needed, and of which only those whose cards changed are
+    rewritten. If DECK is not provided, convert the selected deck, if any.
+    """
+    if not isinstance(decks.get_backend(), decks.JsonBackend):
+        return click.echo("Only decks stored in files can be converted.")
+
+    deck_path = decks.generate_deck_filepath(deck) if deck else decks.selected_deck_path()
+    try:
+        deck_obj = decks.convert_deck(deck_path, deck_format, shard_size)
+    except IOError:
+        if not deck:
+            return click.echo("No deck currently selected.")
+        return click.echo("No deck by that name found.")
+    click.echo(f"Deck {deck_obj.name} is stored in {deck_obj.filepath.name}.")
+
+
+@cli.command("migrate")
+def migrate():
+    """
+    Import the json decks in the storage directory into a SQLite database.
+
+    The json files are left in place. Set the FLASHCARDS_BACKEND environment variable to "sqlite"
+    to use the database afterwards.
+    """
+    from flashcards import database
+
+    deck_paths = decks.JsonBackend().deck_paths()
+    if not deck_paths:
+        return click.echo("You don't have any decks yet.")
+
+    for deck_path, deck in database.import_json_decks(deck_paths):
+        if isinstance(deck, Exception):
+            echo_load_error(deck_path, deck)
+            continue
+        click.echo(f"Imported deck: {deck.name} ({len(deck.cards)} cards)")
+
+
+@cli.command("shell")
+def shell():
+    """
+    Run commands one after another in a single session.
+
+    Type commands as you would after "flashcards", e.g. "add" or "study German", then "exit".
+    Decks are loaded once and kept in memory until their files change, so each command doesn't
+    have to read them again.
+    """
+    import shlex
+
+    click.echo('Flashcards shell. Type "help" for the commands, "exit" to leave.')
+    while True:
+        try:
+            line = input("flashcards> ")
+        except KeyboardInterrupt:
+            click.echo("")
+            continue
+        except EOFError:
+            click.echo("")
+            break
+
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"Invalid command: {e}.")
+            continue
+        if not args:
+            continue
+        if args[0] in ("exit", "quit"):
+            break
+        if args[0] == "help":
+            args = ["--help"]
+        if args[0] == "shell":
+            click.echo("Already in the shell.")
+            continue
+
+        try:
+            cli.main(args, prog_name="flashcards", standalone_mode=False, obj={"shell": True})
+        except click.ClickException as e:
+            e.show()
+        except click.Abort:
+            click.echo("Aborted!")
+        except Exception as e:  # e.g. a corrupted deck; the session carries on with other commands
+            click.echo(f"Error: {type(e).__name__}: {e}", err=True)
@@ -0,0 +1,143 @@
+"""
+Measure where the time of a command goes, for "flashcards --profile".
+
+The work that commands have in common is done in named phases (e.g. "load" for loading a deck,
+"save" for saving one), each of which records how long it took and how many bytes of deck files
+it read and wrote. When the command is done, a table of the phases is printed to stderr. Phases
+can nest (e.g. "load" within "scan"), in which case the time and bytes of the inner phase count
+towards the outer one too.
+
+When nothing is being profiled, a phase costs a function call and a check.
+"""
+from contextlib import contextmanager
+import threading
+import time
+from typing import Optional
+
+profile = None  # the Profile of the command being profiled, if any
+
+
+class Profile:
+    """The phases of a command, as they happened."""
+
+    def __init__(self, output: str = None):
+        self.output = output  # path of a json trace (.json) or of cProfile stats (other)
+        self.start = time.perf_counter()
+        self.events: list = []  # (name, start, duration, bytes read, bytes written, thread id)
+        self.local = threading.local()  # the phases open in each thread, innermost last
+        self.lock = threading.Lock()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.profiler = None
+        if output and not output.endswith(".json"):
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def open_phases(self) -> list:
+        if not hasattr(self.local, "phases"):
+            self.local.phases = []
+        return self.local.phases
+
+    def count_bytes(self, read: int, written: int):
+        with self.lock:
+            self.bytes_read += read
+            self.bytes_written += written
+        for counts in self.open_phases():
+            counts[0] += read
+            counts[1] += written
+
+    def summary(self) -> list:
+        """Get the (name, times entered, seconds, bytes read, bytes written) of each phase, in
+        the order they were first entered."""
+        phases: dict = {}
+        for name, _, duration, read, written, _ in self.events:
+            calls, seconds, total_read, total_written = phases.get(name, (0, 0.0, 0, 0))
+            total_read, total_written = total_read + read, total_written + written
+            phases[name] = (calls + 1, seconds + duration, total_read, total_written)
+        return [(name, *totals) for name, totals in phases.items()]
+
+    def report(self) -> str:
+        """Get a table of the phases, with the command's totals."""
+        lines = [f"{'phase':<12} {'calls':>7} {'seconds':>10} {'read':>12} {'written':>12}"]
+        for name, calls, seconds, read, written in self.summary():
+            lines.append(f"{name:<12} {calls:>7} {seconds:>10.4f} {read:>12} {written:>12}")
+        total = time.perf_counter() - self.start
+        lines.append(
+            f"{'total':<12} {'':>7} {total:>10.4f} {self.bytes_read:>12} {self.bytes_written:>12}"
+        )
+        return "\n".join(lines)
+
+    def finish(self):
+        """Stop profiling, and write the trace or the cProfile stats if asked to."""
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.output)
+        elif self.output:
+            import json
+
+            with open(self.output, "w") as file:
+                json.dump(self.trace(), file)
+
+    def trace(self) -> dict:
+        """Get the phases in the Trace Event Format, which chrome://tracing and Perfetto show."""
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self.start) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": 1,
+                    "tid": thread_id,
+                    "args": {"bytes_read": read, "bytes_written": written},
+                }
+                for name, start, duration, read, written, thread_id in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+
+def start(output: str = None):
+    """Start profiling the command about to run."""
+    global profile
+    profile = Profile(output)
+
+
+def stop() -> Optional[Profile]:
+    """Stop profiling, and get the profile of the command that ran."""
+    global profile
+    finished, profile = profile, None
+    if finished is not None:
+        finished.finish()
+    return finished
+
+
+@contextmanager
+def phase(name: str):
+    """Record the time and bytes of the work done within the block, as a phase named *name*."""
+    current = profile
+    if current is None:
+        yield
+        return
+
+    counts = [0, 0]  # bytes read, bytes written
+    phases = current.open_phases()
+    phases.append(counts)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        phases.pop()  # phases in a thread are nested, so this one is innermost
+        with current.lock:
+            current.events.append(
+                (name, start, duration, counts[0], counts[1], threading.get_ident())
+            )
+
+
+def count_bytes(read: int = 0, written: int = 0):
+    """Count bytes read from or written to files towards the open phases and the command."""
+    if profile is not None:
+        profile.count_bytes(read, written)
@@ -0,0 +1,216 @@
+"""
+Search the questions and answers of all decks through a full-text index.
+
+The index is a SQLite database in the storage directory, with an FTS5 table (an inverted index
+from words to the cards they appear in) and a table of the deck and id of each indexed card. It
+is built by the first search, and from then on kept current as cards are added, edited and saved.
+Decks whose files have changed in other ways are indexed again by the next search.
+"""
+from contextlib import closing
+import os
+from pathlib import Path
+import re
+import zlib
+
+from flashcards import decks
+from flashcards.database import deck_stem
+
+SEARCH_INDEX_NAME = ".SEARCHINDEX"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    stem TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    stamp TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    deck_id INTEGER NOT NULL REFERENCES decks (id) ON DELETE CASCADE,
+    card_id TEXT NOT NULL,
+    digest INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_deck_id ON entries (deck_id, card_id, digest);
+CREATE VIRTUAL TABLE IF NOT EXISTS card_text USING fts5 (
+    question, answer, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6'
+);
+"""
+
+# bm25 weights of the question and answer columns: matches in the question count for more
+QUESTION_WEIGHT = 2.0
+ANSWER_WEIGHT = 1.0
+
+
+def search_index_path() -> Path:
+    """Get the absolute path of the search index in the storage directory."""
+    return decks.storage_path() / SEARCH_INDEX_NAME
+
+
+def connect():
+    """Open a connection to the search index, creating it if it doesn't exist."""
+    import sqlite3
+
+    decks.create_storage_directory()
+    connection = sqlite3.connect(str(search_index_path()))
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def deck_stamp(filepath: Path):
+    """Get the modification time and size of a deck file, or None for decks not stored in files.
+
+    Cards added or edited through the app update the index directly, so only the deck file (and
+    not its journal) has to be checked for other changes.
+    """
+    if not isinstance(decks.get_backend(), decks.JsonBackend):
+        return None
+    stat = os.stat(filepath)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def card_digest(card) -> int:
+    """Get a checksum of the text of a card, to find the cards that changed since indexing."""
+    return zlib.crc32(f"{card['question']}\0{card['answer']}".encode("utf-8"))
+
+
+def match_expression(query: str) -> str:
+    """Turn a query into an FTS5 expression matching cards with words starting with each of its
+    words, e.g. 'mult tab' matches 'multiplication table'."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def index_deck(connection, deck: decks.Deck, stamp):
+    """Bring the index entries of a deck in line with its cards, changing only those that differ."""
+    stem = deck_stem(deck.filepath)
+    connection.execute(
+        "INSERT INTO decks (stem, name, stamp) VALUES (?, ?, ?) "
+        "ON CONFLICT (stem) DO UPDATE SET name = excluded.name, stamp = excluded.stamp",
+        (stem, deck.name, stamp),
+    )
+    (deck_id,) = connection.execute("SELECT id FROM decks WHERE stem = ?", (stem,)).fetchone()
+
+    with decks.garbage_collection_paused():
+        indexed = {
+            card_id: (entry_id, digest)
+            for entry_id, card_id, digest in connection.execute(
+                "SELECT id, card_id, digest FROM entries WHERE deck_id = ?", (deck_id,)
+            )
+        }
+        changed = []
+        for card in deck.cards:
+            entry_id, digest = indexed.pop(card["id"], (None, None))
+            new_digest = card_digest(card)
+            if new_digest != digest:
+                changed.append((entry_id, card, new_digest))
+
+    write_entries(connection, deck_id, changed)
+    removed = [(entry_id,) for entry_id, _ in indexed.values()]
+    connection.executemany("DELETE FROM card_text WHERE rowid = ?", removed)
+    connection.executemany("DELETE FROM entries WHERE id = ?", removed)
+
+
+def write_entries(connection, deck_id: int, changes: list):
+    """Index cards, given as (id of the entry to replace or None, card, digest) tuples."""
+    (next_id,) = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()
+    replaced = []
+    rows = []
+    for entry_id, card, digest in changes:
+        if entry_id is None:
+            entry_id = next_id
+            next_id += 1
+        else:
+            replaced.append((entry_id,))
+        rows.append((entry_id, card["id"], digest, card["question"], card["answer"]))
+
+    connection.executemany("DELETE FROM card_text WHERE rowid = ?", replaced)
+    connection.executemany(
+        "INSERT OR REPLACE INTO entries (id, deck_id, card_id, digest) VALUES (?, ?, ?, ?)",
+        ((entry_id, deck_id, card_id, digest) for entry_id, card_id, digest, _, _ in rows),
+    )
+    connection.executemany(
+        "INSERT INTO card_text (rowid, question, answer) VALUES (?, ?, ?)",
+        ((entry_id, question, answer) for entry_id, _, _, question, answer in rows),
+    )
+
+
+def refresh(connection):
+    """Index the decks that are new or have changed since they were indexed, and remove the
+    decks that no longer exist."""
+    indexed = dict(connection.execute("SELECT stem, stamp FROM decks"))
+    stale = []
+    for deck_path in decks.deck_paths():
+        stamp = deck_stamp(deck_path)
+        stem = deck_stem(deck_path)
+        if stem not in indexed or indexed.pop(stem) != stamp:
+            stale.append((deck_path, stamp))
+
+    for stem in indexed:  # decks that have been removed
+        connection.execute(
+            "DELETE FROM card_text WHERE rowid IN (SELECT entries.id FROM entries "
+            "JOIN decks ON decks.id = entries.deck_id WHERE decks.stem = ?)",
+            (stem,),
+        )
+        connection.execute("DELETE FROM decks WHERE stem = ?", (stem,))
+
+    stamps = dict(stale)
+    for deck_path, deck in decks.load_decks([deck_path for deck_path, _ in stale]):
+        if not isinstance(deck, Exception):  # corrupted decks are left out until they're fixed
+            index_deck(connection, deck, stamps[deck_path])
+
+
+def search(query: str, limit: int = 20) -> list:
+    """Get the cards best matching *query*, as (deck name, question, answer) tuples."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+
+    with closing(connect()) as connection:
+        with connection:
+            refresh(connection)
+        # ordered by rank and limited within the full-text query, FTS5 keeps only the best
+        # matches as it goes, rather than sorting all of them
+        return connection.execute(
+            "SELECT decks.name, matches.question, matches.answer FROM ("
+            "SELECT rowid, question, answer, rank FROM card_text "
+            "WHERE card_text MATCH ? AND rank MATCH ? ORDER BY rank LIMIT ?"
+            ") AS matches JOIN entries ON entries.id = matches.rowid "
+            "JOIN decks ON decks.id = entries.deck_id ORDER BY matches.rank",
+            (expression, f"bm25({QUESTION_WEIGHT}, {ANSWER_WEIGHT})", limit),
+        ).fetchall()
+
+
+def updating(function):
+    """Run *function* with a connection to the search index, unless there is no index yet, in
+    which case the first search will build it."""
+    if not search_index_path().exists():
+        return
+    with closing(connect()) as connection, connection:
+        function(connection)
+
+
+def deck_saved(deck: decks.Deck):
+    """Update the index after a deck has been saved."""
+    updating(lambda connection: index_deck(connection, deck, deck_stamp(deck.filepath)))
+
+
+def cards_written(filepath: Path, cards: list):
+    """Update the index after cards have been added to, or edited in, the deck at *filepath*."""
+
+    def update(connection):
+        row = connection.execute(
+            "SELECT id FROM decks WHERE stem = ?", (deck_stem(filepath),)
+        ).fetchone()
+        if row is None:  # the deck isn't indexed yet; the next search will index all of it
+            return
+        (deck_id,) = row
+        changes = []
+        for card in cards:
+            entry = connection.execute(
+                "SELECT id FROM entries WHERE deck_id = ? AND card_id = ?", (deck_id, card["id"])
+            ).fetchone()
+            changes.append((entry[0] if entry else None, card, card_digest(card)))
+        write_entries(connection, deck_id, changes)
+
+    updating(update)
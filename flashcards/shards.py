@@ -0,0 +1,191 @@
+"""
+Store a deck as a directory of shards, each holding a fixed number of cards, so that saving a very
+large deck rewrites only the shards whose cards have changed.
+
+A sharded deck is a directory named after the deck and ending in ".deck", which holds:
+
+    manifest.json   json object with the deck's name and description, the number of cards a shard
+                    holds at most ("shard_size"), and the number of cards in each shard ("counts")
+    000000.json...  the shards, in order: each a json list of cards
+
+A shard is only read when one of its cards is needed. Each file is replaced atomically, and the
+manifest is written after the shards, so a save that is interrupted leaves a deck that loads: cards
+that were being added past the end of a shard are ignored until the manifest counts them.
+"""
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import accumulate
+from pathlib import Path
+
+from flashcards import decks, profiling
+
+MANIFEST_NAME = decks.SHARD_MANIFEST_NAME
+DEFAULT_SHARD_SIZE = 10_000  # cards
+
+
+def manifest_path(dirpath: Path) -> Path:
+    """Get the path of the manifest of the sharded deck at *dirpath*."""
+    return Path(dirpath) / MANIFEST_NAME
+
+
+def shard_path(dirpath: Path, number: int) -> Path:
+    """Get the path of a shard of the sharded deck at *dirpath*."""
+    return Path(dirpath) / f"{number:06d}.json"
+
+
+def read_manifest(dirpath: Path) -> dict:
+    """Get the manifest of the sharded deck at *dirpath*."""
+    with open(manifest_path(dirpath), "rb") as file:
+        manifest = decks.decode(file.read())
+    for key in ("name", "description", "shard_size", "counts"):
+        if key not in manifest:
+            raise KeyError(f"The deck's manifest is corrupted - '{key}' key is missing.")
+    return manifest
+
+
+def create(dirpath: Path, deck: decks.Deck, shard_size: int = DEFAULT_SHARD_SIZE):
+    """Create the directory of a sharded deck, with a manifest and no shards yet."""
+    Path(dirpath).mkdir()
+    write_manifest(dirpath, deck, shard_size, [])
+
+
+def write_manifest(dirpath: Path, deck: decks.Deck, shard_size: int, counts: list):
+    """Write the manifest of a sharded deck, whose shards hold *counts* cards."""
+    manifest = {
+        "name": deck.name,
+        "description": deck.description,
+        "shard_size": shard_size,
+        "counts": counts,
+    }
+    decks.write_atomically(manifest_path(dirpath), decks.encode(manifest, compact=True))
+
+
+def encode_shard(cards: list) -> bytes:
+    """Get the contents of a shard file holding *cards*."""
+    return decks.encode([decks.card_to_dict(card) for card in cards], compact=True)
+
+
+def save_deck(deck: decks.Deck):
+    """Write a deck to its directory: if its cards were loaded from there, only the shards that
+    have changed since (or that cards were added to) are rewritten, and otherwise all of them."""
+    dirpath = deck.filepath
+    cards = deck.cards
+
+    if isinstance(cards, ShardedCards) and cards.dirpath == dirpath:
+        cards.fold_in_appended()
+        for number, shard in sorted(cards.shards.items()):
+            data = encode_shard(shard)
+            if data != cards.contents.get(number):
+                decks.write_atomically(shard_path(dirpath, number), data)
+                cards.contents[number] = data
+        shard_size, counts = cards.shard_size, cards.counts
+    else:
+        shard_size = DEFAULT_SHARD_SIZE
+        if manifest_path(dirpath).exists():  # e.g. made by create(), with its own shard size
+            shard_size = read_manifest(dirpath)["shard_size"]
+        dirpath.mkdir(exist_ok=True)
+        cards = list(cards)
+        counts = []
+        for start in range(0, len(cards), shard_size):
+            shard = cards[start : start + shard_size]
+            decks.write_atomically(shard_path(dirpath, len(counts)), encode_shard(shard))
+            counts.append(len(shard))
+
+    write_manifest(dirpath, deck, shard_size, counts)
+
+    # shards left over from when the deck had more of them
+    for path in dirpath.glob("*.json"):
+        if path.stem.isdigit() and int(path.stem) >= len(counts):
+            path.unlink()
+
+
+class ShardedCards(Sequence):
+    """The cards of a sharded deck, read a shard at a time as they are accessed.
+
+    Loaded shards are kept, so that changes made to their cards are kept too. Cards can be
+    appended, as to a list; they are put into shards when the deck is saved.
+    """
+
+    def __init__(self, dirpath, manifest: dict):
+        self.dirpath = Path(dirpath).resolve()
+        self.shard_size = manifest["shard_size"]
+        self.counts = list(manifest["counts"])
+        self.ends = list(accumulate(self.counts))  # position just after the last card of each
+        self.shards: dict = {}  # shard number -> its cards, for the shards loaded so far
+        self.contents: dict = {}  # shard number -> its file's contents, to tell if it has changed
+        self.appended: list = []
+
+    @property
+    def card_count(self) -> int:
+        """The number of cards in shards."""
+        return self.ends[-1] if self.ends else 0
+
+    def __len__(self):
+        return self.card_count + len(self.appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("card index out of range")
+
+        if index >= self.card_count:
+            return self.appended[index - self.card_count]
+        number = bisect_right(self.ends, index)
+        return self.shard(number)[index - (self.ends[number - 1] if number else 0)]
+
+    def append(self, card: dict):
+        """Add a card after the cards in the shards."""
+        self.appended.append(card)
+
+    def shard(self, number: int) -> list:
+        """Get the cards of a shard, reading it if it hasn't been yet."""
+        if number not in self.shards:
+            path = shard_path(self.dirpath, number)
+            with open(path, "rb") as file:
+                data = file.read()
+            profiling.count_bytes(read=len(data))
+            cards = decks.decode(data)
+            if not isinstance(cards, list):
+                raise ValueError(f"The deck's shard {path.name} is corrupted - it isn't a list.")
+
+            # a save that was interrupted may have added cards the manifest doesn't count yet
+            with decks.garbage_collection_paused():
+                self.shards[number] = [
+                    decks.Card.from_dict(card) for card in cards[: self.counts[number]]
+                ]
+            self.contents[number] = data
+        return self.shards[number]
+
+    def find(self, card_id: str) -> decks.Card:
+        """Get the card with the given id, reading shards in order until it is found."""
+        for cards in (*self.shards.values(), self.appended):
+            for card in cards:
+                if card["id"] == card_id:
+                    return card
+
+        for number in range(len(self.counts)):
+            if number not in self.shards:
+                for card in self.shard(number):
+                    if card["id"] == card_id:
+                        return card
+        raise KeyError(card_id)
+
+    def fold_in_appended(self):
+        """Put the appended cards into the last shard, while it has room, and then into new
+        shards."""
+        appended, self.appended = self.appended, []
+        if appended and self.counts and self.counts[-1] < self.shard_size:
+            last = self.shard(len(self.counts) - 1)
+            room = self.shard_size - len(last)
+            last.extend(appended[:room])
+            self.counts[-1] = len(last)
+            appended = appended[room:]
+
+        for start in range(0, len(appended), self.shard_size):
+            self.shards[len(self.counts)] = appended[start : start + self.shard_size]
+            self.counts.append(len(self.shards[len(self.counts)]))
+
+        self.ends = list(accumulate(self.counts))
@@ -0,0 +1,313 @@
+"""Provide the cards of a study session lazily, and schedule cards for review."""
+from bisect import bisect_right
+import heapq
+from itertools import accumulate
+import json
+import os
+from pathlib import Path
+import random
+import signal
+import threading
+import time
+
+from flashcards import decks, profiling
+
+DAY = 24 * 60 * 60  # seconds
+
+# key pressed after the answer is shown -> quality of recall (0-5) as used by SM-2
+GRADES = {"1": 1, "2": 3, "3": 4, "4": 5}
+DEFAULT_EASE = 2.5
+MINIMUM_EASE = 1.3
+FLUSH_INTERVAL_ENV_VAR = "FLASHCARDS_FLUSH_INTERVAL"
+DEFAULT_FLUSH_INTERVAL = 60  # seconds
+SESSION_NAME = ".STUDYSESSION"
+
+
+class Permutation:
+    """A pseudo-random order of the integers 0 to n - 1, given by *seed*, computed on demand.
+
+    The i-th number is found by encrypting i with a small Feistel network keyed by the seed, over
+    the smallest range of an even number of bits that holds n numbers. Encryption maps that range
+    onto itself one-to-one, so numbers that fall outside 0 to n - 1 are encrypted again ("cycle
+    walking") until one falls inside; the range is less than four times n, so that takes a few
+    rounds at most, on average. Nothing but the round keys is stored, however large n is, and the
+    same seed always gives the same order.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, n: int, seed=None):
+        self.n = n
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.half_bits = (max(2, (n - 1).bit_length()) + 1) // 2
+        self.mask = (1 << self.half_bits) - 1
+        rng = random.Random(self.seed)
+        self.keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self.n:
+            raise IndexError("permutation index out of range")
+        while True:
+            i = self.encrypt(i)
+            if i < self.n:
+                return i
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def encrypt(self, x: int) -> int:
+        left, right = x >> self.half_bits, x & self.mask
+        for key in self.keys:
+            left, right = right, left ^ (mix(right ^ key) & self.mask)
+        return (left << self.half_bits) | right
+
+
+def mix(x: int) -> int:
+    """Scramble the bits of a 64-bit integer (the finalizer of SplitMix64)."""
+    x = (x + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def iter_positions(deck_paths: list, counts: list, ordered=False, seed=None, start: int = 0):
+    """Yield (position in the order, deck, card) tuples from the decks at *deck_paths*, which hold
+    *counts* cards.
+
+    If *ordered*, each deck's cards are yielded in the order they were added, one deck at a time.
+    Otherwise cards are yielded in random order across all the decks (the same order for the same
+    *seed* and decks), and a deck is only loaded when the first of its cards comes up. The first
+    *start* cards of the order are skipped.
+    """
+    ends = list(accumulate(counts))  # position just after the last card of each deck
+    total = ends[-1] if ends else 0
+    order = range(total) if ordered else Permutation(total, seed)
+    loaded: dict = {}
+
+    for position in range(start, total):
+        with profiling.phase("shuffle"):
+            card_position = order[position]
+        deck_num = bisect_right(ends, card_position)
+        if deck_num not in loaded:
+            if ordered:
+                loaded.clear()  # the decks before this one are done with
+            loaded[deck_num] = decks.load_deck(deck_paths[deck_num])
+        deck = loaded[deck_num]
+
+        card_num = card_position - (ends[deck_num - 1] if deck_num else 0)
+        if card_num < len(deck.cards):  # the deck may have changed since it was counted
+            yield position, deck, deck.cards[card_num]
+
+
+class Session:
+    """A study session of the cards of some decks, which can be saved and later resumed.
+
+    A session is saved as its decks, their card counts, its order (by its seed) and how far it has
+    got, so it can be resumed without counting or shuffling the cards again. Used as a context
+    manager, the session is saved however it ends.
+    """
+
+    def __init__(self, deck_paths: list, counts: list, ordered=False, seed=None, position=0):
+        # the decks themselves, rather than e.g. the link to the selected deck, which may change
+        self.deck_paths = [Path(deck_path).resolve() for deck_path in deck_paths]
+        self.counts = counts
+        self.ordered = ordered
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.position = position  # of the first card not yet done
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+
+    def cards(self):
+        """Yield the (deck, card) pairs not yet done; a card is done once the next is asked for."""
+        for position, deck, card in iter_positions(
+            self.deck_paths, self.counts, self.ordered, self.seed, self.position
+        ):
+            yield deck, card
+            self.position = position + 1
+        self.position = len(self)
+
+    def changed_decks(self) -> list:
+        """Get the decks that can't be read anymore, or whose number of cards has changed since
+        the session began, as (deck path, count then, count now or None) tuples."""
+        changed = []
+        summaries = decks.load_summaries(self.deck_paths)
+        for (deck_path, summary), count in zip(summaries, self.counts):
+            if isinstance(summary, Exception):
+                changed.append((deck_path, count, None))
+            elif summary["count"] != count:
+                changed.append((deck_path, count, summary["count"]))
+        return changed
+
+    def save(self):
+        """Save the session, to be resumed, or remove the saved session if this one is done."""
+        if self.position >= len(self):
+            try:
+                session_path().unlink()
+            except FileNotFoundError:
+                pass
+            return
+        content = {
+            "deck_paths": [str(deck_path) for deck_path in self.deck_paths],
+            "counts": self.counts,
+            "ordered": self.ordered,
+            "seed": self.seed,
+            "position": self.position,
+        }
+        decks.write_atomically(session_path(), decks.encode(content, compact=True))
+
+    @classmethod
+    def load(cls):
+        """Get the saved session, or None if there isn't one."""
+        try:
+            with open(session_path(), "rb") as file:
+                return cls(**decks.decode(file.read()))
+        except (FileNotFoundError, json.decoder.JSONDecodeError, TypeError):
+            return None
+
+
+def session_path() -> Path:
+    """Get the path of the saved study session in the storage directory."""
+    return decks.storage_path() / SESSION_NAME
+
+
+def schedule(card: dict, quality: int, now: float = None) -> dict:
+    """Get the card's new scheduling fields after it was recalled with *quality* (0-5), per SM-2.
+
+    Cards that haven't been studied yet start with the default ease and no repetitions.
+    """
+    now = time.time() if now is None else now
+    ease = card.get("ease", DEFAULT_EASE)
+    repetitions = card.get("repetitions", 0)
+    interval = card.get("interval", 0)
+
+    if quality < 3:
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+
+    ease += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease = max(MINIMUM_EASE, round(ease, 2))
+
+    return {
+        "ease": ease,
+        "interval": interval,
+        "repetitions": repetitions,
+        "due": int(now + interval * DAY),
+    }
+
+
+def due_queue(deck_paths: list, now: float = None) -> list:
+    """Get a priority queue (a heap keyed on due time) of the cards in the decks that are due.
+
+    Cards that haven't been studied yet are due immediately. Only the decks with a card that may
+    be due are loaded, but each of those is loaded whole.
+    """
+    now = time.time() if now is None else now
+    # decks that the deck index says have nothing due yet aren't loaded
+    deck_paths = [
+        deck_path
+        for deck_path, next_due in zip(deck_paths, decks.next_due_times(deck_paths))
+        if next_due is None or next_due <= now
+    ]
+    queue: list = []
+    for _, deck in decks.load_decks(deck_paths):
+        if isinstance(deck, Exception):
+            raise deck
+        for card in deck.cards:
+            due = card.get("due", 0)
+            if due <= now:
+                # the counter keeps entries with the same due time from comparing decks and cards
+                queue.append((due, len(queue), deck, card))
+    heapq.heapify(queue)
+    return queue
+
+
+def iter_queue(queue: list):
+    """Yield (deck, card) pairs from a due queue, most overdue first."""
+    while queue:
+        due, _, deck, card = heapq.heappop(queue)
+        yield deck, card
+
+
+class PendingEdits:
+    """Grades and edits made during a study session, held back and written to each deck in batches.
+
+    Cards are changed in memory right away, so an edited card shows its edits if it comes up again.
+    The changed cards of each deck are written in one go (a single append to its journal) when
+    flush() is called, and by the first change after *interval* seconds since the last flush, so
+    that at most that much work is lost if the process is killed outright.
+
+    Used as a context manager, the edits are also flushed when the session ends, however it ends:
+    normally, by an exception (e.g. KeyboardInterrupt on Ctrl-C), or by SIGTERM.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = flush_interval() if interval is None else interval
+        self.decks: dict = {}  # deck filepath -> (deck, {card id: card}, whether any text changed)
+        self.last_flush = time.monotonic()
+
+    def __enter__(self):
+        self.previous_handler = None
+        if threading.current_thread() is threading.main_thread():  # only it can handle signals
+            self.previous_handler = signal.signal(signal.SIGTERM, exit_on_signal)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.previous_handler is not None:
+            signal.signal(signal.SIGTERM, self.previous_handler)
+        self.flush()
+
+    def update_card(self, deck: decks.Deck, card: dict, **fields):
+        """Change fields of a card of *deck*, to be written with the next flush."""
+        card.update(fields)
+        _, cards, text_changed = self.decks.get(deck.filepath, (deck, {}, False))
+        cards[card["id"]] = card
+        text_changed = text_changed or "question" in fields or "answer" in fields
+        self.decks[deck.filepath] = (deck, cards, text_changed)
+
+        if time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Write the changed cards of every deck that has any."""
+        if self.decks:
+            with profiling.phase("flush"):
+                self.write()
+        self.last_flush = time.monotonic()
+
+    def write(self):
+        for filepath in list(self.decks):
+            deck, cards, text_changed = self.decks[filepath]
+            deck.write_cards(list(cards.values()), text_changed=text_changed)
+            del self.decks[filepath]  # only once written, so a failed write can be retried
+
+
+def flush_interval() -> float:
+    """Get the seconds between writes of a study session's edits, per FLASHCARDS_FLUSH_INTERVAL."""
+    interval = os.environ.get(FLUSH_INTERVAL_ENV_VAR, str(DEFAULT_FLUSH_INTERVAL))
+    try:
+        return float(interval)
+    except ValueError:
+        raise ValueError(f"Invalid flush interval '{interval}' - use a number of seconds.")
+
+
+def exit_on_signal(signum, frame):
+    """Exit as if by sys.exit(), so that cleanup (e.g. writing a session's edits) still runs."""
+    raise SystemExit(128 + signum)
@@ -0,0 +1,144 @@
+"""
+Read cards from, and write cards to, files in other formats, one card at a time.
+
+Supported formats are CSV and TSV (a question column and an answer column, with an optional
+header row), JSON Lines (one object per card, with a "question" and an "answer"), and the "Notes
+in Plain Text" export of Anki (tab-separated, with "#key:value" header lines, which may give
+columns holding a note's GUID, note type, deck or tags rather than its fields).
+"""
+import csv
+import html
+from itertools import chain
+import json
+from pathlib import Path
+import re
+from typing import Optional
+
+from flashcards.exceptions import ImportFileException
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".tab": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".txt": "anki",
+}
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+ANKI_SEPARATORS = {
+    "tab": "\t",
+    "comma": ",",
+    "semicolon": ";",
+    "space": " ",
+    "pipe": "|",
+    "colon": ":",
+}
+# header lines of an Anki export giving (1-based) columns that hold something other than fields
+ANKI_COLUMN_SETTINGS = ("guid column", "notetype column", "deck column", "tags column")
+HEADER = ["question", "answer"]
+SCHEDULING_FIELDS = ("ease", "interval", "repetitions", "due")  # kept by JSON Lines
+CHUNK_SIZE = 1000  # cards added to a deck per write when importing
+
+
+def format_from_filename(filename: str) -> Optional[str]:
+    """Get the format of a file from its extension, or None if it isn't a known one."""
+    return FORMAT_EXTENSIONS.get(Path(filename).suffix.lower())
+
+
+def read_cards(file, file_format: str):
+    """Yield the cards in an open text file, as dicts with a question and an answer.
+
+    Raise an ImportFileException for the first line that doesn't hold a card.
+    """
+    if file_format == "jsonl":
+        yield from read_json_lines(file)
+    elif file_format == "anki":
+        yield from read_anki(file)
+    else:
+        yield from read_rows(file, DELIMITERS[file_format])
+
+
+def read_rows(lines, delimiter: str, skip_header: bool = True, skip_columns=()):
+    """Yield cards from the rows of delimited text, ignoring blank rows, the columns numbered
+    (from 1) in *skip_columns* and any columns after the answer."""
+    reader = csv.reader(lines, delimiter=delimiter)
+    for row in reader:
+        if skip_columns:
+            row = [field for i, field in enumerate(row, start=1) if i not in skip_columns]
+        if skip_header and reader.line_num == 1 and [f.lower() for f in row[:2]] == HEADER:
+            continue
+        if not any(field.strip() for field in row):
+            continue
+        if len(row) < 2 or not row[0].strip() or not row[1].strip():
+            raise ImportFileException(f"Line {reader.line_num}: expected a question and an answer.")
+        yield {"question": row[0], "answer": row[1]}
+
+
+def read_json_lines(lines):
+    """Yield cards from JSON Lines, keeping any scheduling fields."""
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            content = json.loads(line)
+        except ValueError:
+            raise ImportFileException(f"Line {line_num}: not valid json.")
+
+        if not isinstance(content, dict) or not all(
+            isinstance(content.get(field), str) and content[field].strip() for field in HEADER
+        ):
+            raise ImportFileException(f"Line {line_num}: expected a question and an answer.")
+        card = {"question": content["question"], "answer": content["answer"]}
+        card.update((field, content[field]) for field in SCHEDULING_FIELDS if field in content)
+        yield card
+
+
+def read_anki(lines):
+    """Yield cards from an Anki plain text export, per the settings in its header lines."""
+    settings = {}
+    lines = iter(lines)
+    for line in lines:
+        if not line.startswith("#"):
+            lines = chain([line], lines)
+            break
+        key, _, value = line[1:].strip().partition(":")
+        settings[key.strip().lower()] = value.strip()
+
+    separator = settings.get("separator", "tab")
+    delimiter = ANKI_SEPARATORS.get(separator.lower(), separator)
+    skip_columns = set()
+    for setting in ANKI_COLUMN_SETTINGS:
+        try:
+            skip_columns.add(int(settings[setting]))
+        except (KeyError, ValueError):
+            pass
+    for card in read_rows(lines, delimiter, skip_header=False, skip_columns=skip_columns):
+        if settings.get("html", "false").lower() == "true":
+            card = {field: html_to_text(value) for field, value in card.items()}
+        yield card
+
+
+def html_to_text(value: str) -> str:
+    """Turn an Anki field's HTML into plain text: line breaks become newlines."""
+    value = re.sub(r"<br\s*/?>", "\n", value, flags=re.IGNORECASE)
+    value = re.sub(r"<[^>]+>", "", value)
+    return html.unescape(value)
+
+
+def write_cards(cards, file, file_format: str):
+    """Write cards to an open text file, one at a time."""
+    if file_format == "jsonl":
+        for card in cards:
+            card = {key: value for key, value in card.items() if key != "id"}
+            file.write(json.dumps(card, ensure_ascii=False) + "\n")
+        return
+
+    if file_format == "anki":
+        file.write("#separator:tab\n#html:false\n")
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+    else:
+        writer = csv.writer(file, delimiter=DELIMITERS[file_format], lineterminator="\n")
+        writer.writerow(HEADER)
+
+    for card in cards:
+        writer.writerow((card["question"], card["answer"]))
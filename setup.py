@@ -12,6 +12,7 @@ setup(
     license="MIT",
     python_requires=">=3.7",
     install_requires=["click==7.1"],
+    extras_require={"fast": ["orjson"]},
     entry_points="""
         [console_scripts]
         flashcards=flashcards.main:cli
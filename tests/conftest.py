@@ -68,3 +68,10 @@ def italian_deck(create_storage_directory):
     deck.create_file()
     deck.save()
     return deck
+
+
+@pytest.fixture
+def sqlite_backend(create_storage_directory, monkeypatch):
+    """Store decks in a SQLite database (in the tmp storage directory) rather than json files."""
+    monkeypatch.setenv(decks.BACKEND_ENV_VAR, "sqlite")
+    return decks.get_backend()
@@ -0,0 +1,18 @@
+"""Check that the benchmark suite still runs against the current code."""
+from benchmarks import suite
+
+
+def test_scenario_measures_every_operation():
+    results = suite.run_scenario(2, 10)
+    assert results["decks"] == 2
+    assert results["operations"]["cli study all (first card)"]["seconds"] > 0
+    assert all(result["peak_bytes"] > 0 for result in results["operations"].values())
+
+
+def test_regressions_are_reported():
+    def results(seconds):
+        operations = {"load_deck": {"seconds": seconds, "peak_bytes": 0}}
+        return {"scenarios": [{"decks": 1, "cards_per_deck": 10, "operations": operations}]}
+
+    assert suite.regressions(results(1.4), results(1.0), 1.5) == []
+    assert suite.regressions(results(2.0), results(1.0), 1.5) == [("1 x 10", "load_deck", 2.0)]
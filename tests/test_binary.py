@@ -0,0 +1,138 @@
+"""Test the binary deck format."""
+import pytest
+
+from flashcards import binary, decks
+
+
+@pytest.fixture
+def binary_math_deck(math_deck):
+    """The math deck, converted to a binary file."""
+    return decks.convert_deck(math_deck.filepath, deck_format="binary")
+
+
+def test_convert_replaces_json_file(math_deck, binary_math_deck):
+    assert binary_math_deck.filepath.suffix == decks.BINARY_DECK_EXTENSION
+    assert binary_math_deck.filepath.exists()
+    assert not math_deck.filepath.exists()
+    assert decks.generate_deck_filepath("Basic Math") == binary_math_deck.filepath
+
+
+def test_binary_deck_round_trip(math_deck, binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    assert isinstance(deck.cards, binary.LazyCards)
+    assert deck.name == math_deck.name
+    assert deck.description == math_deck.description
+    assert list(deck.cards) == math_deck.cards
+
+
+def test_cards_are_decoded_as_accessed(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    assert len(deck.cards) == 4
+    assert deck.cards[2]["question"] == "2 + 4 = ?"
+    assert deck.cards[-1]["answer"] == "7"
+    assert sorted(deck.cards.loaded) == [2, 3]
+
+
+def test_cards_can_be_counted(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    assert deck.cards.count(deck.cards[0]) == 1
+
+
+def test_card_index_out_of_range(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    with pytest.raises(IndexError):
+        deck.cards[4]
+
+
+def test_scheduling_fields_and_unicode_are_kept(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    deck.cards[0].update(question="Ça fait 2 + 2 ≠ 5?", ease=2.36, interval=6, due=1700000000)
+    deck.save()
+    card = decks.load_deck(binary_math_deck.filepath).cards[0]
+    assert card["question"] == "Ça fait 2 + 2 ≠ 5?"
+    assert (card["ease"], card["interval"], card["due"]) == (2.36, 6, 1700000000)
+
+
+def test_undecoded_records_are_copied_on_save(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    deck.cards[1]["answer"] = "five"
+    deck.save()
+    cards = decks.load_deck(binary_math_deck.filepath).cards
+    assert [card["answer"] for card in cards] == ["4", "five", "6", "7"]
+
+
+def test_journaled_cards_are_replayed(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    card_id = deck.cards[1]["id"]
+    decks.append_card(binary_math_deck.filepath, {"question": "3 + 3 = ?", "answer": "6"})
+    card = deck.get_card(card_id)
+    card.update(answer="five")
+    deck.write_cards([card])
+
+    deck = decks.load_deck(binary_math_deck.filepath)
+    assert len(deck.cards) == 5
+    assert deck.get_card(card_id)["answer"] == "five"
+    assert deck.cards[4]["question"] == "3 + 3 = ?"
+
+
+def test_get_card_reads_only_ids(binary_math_deck):
+    deck = decks.load_deck(binary_math_deck.filepath)
+    card_id = decks.load_deck(binary_math_deck.filepath).cards[3]["id"]
+    assert deck.get_card(card_id)["answer"] == "7"
+    assert list(deck.cards.loaded) == [3]
+    with pytest.raises(KeyError):
+        deck.get_card("missing")
+
+
+def test_summary_of_binary_deck(binary_math_deck):
+    summary = decks.load_summary(binary_math_deck.filepath)
+    assert summary == {
+        "name": "Basic Math",
+        "description": "For learning basic arithmetic.",
+        "count": 4,
+    }
+
+
+def test_save_records_next_due_without_decoding_cards(math_deck):
+    for card in math_deck.cards:
+        card["due"] = 5000
+    math_deck.save()
+    binary_deck = decks.convert_deck(math_deck.filepath, deck_format="binary")
+    assert decks.load_deck(binary_deck.filepath).cards.metadata["next_due"] == 5000
+
+    decks.deck_cache.clear()
+    deck = decks.load_deck(binary_deck.filepath)
+    deck.cards[1]["due"] = 500
+    deck.save()
+    assert list(deck.cards.loaded) == [1]
+    assert decks.read_index()[binary_deck.filepath.name]["next_due"] == 500
+
+    decks.deck_cache.clear()
+    deck = decks.load_deck(binary_deck.filepath)
+    assert decks.next_due_times([binary_deck.filepath]) == [500]
+    assert deck.cards.metadata["next_due"] == 500
+    assert not deck.cards.loaded
+
+
+def test_deck_paths_include_binary_decks(binary_math_deck, german_deck):
+    assert decks.deck_paths() == [binary_math_deck.filepath, german_deck.filepath]
+
+
+def test_convert_back_to_json(math_deck, binary_math_deck):
+    deck = decks.convert_deck(binary_math_deck.filepath, deck_format="json")
+    assert deck.filepath == math_deck.filepath
+    assert not binary_math_deck.filepath.exists()
+    assert decks.load_deck(math_deck.filepath).cards == math_deck.cards
+
+
+def test_convert_relinks_selected_deck(math_deck):
+    decks.link_selected_deck(math_deck.filepath)
+    deck = decks.convert_deck(decks.selected_deck_path(), deck_format="binary")
+    assert decks.selected_deck_path().resolve() == deck.filepath
+
+
+def test_file_that_is_not_a_binary_deck_raises_error(storage_path, create_storage_directory):
+    filepath = storage_path / "broken.fcb"
+    filepath.write_bytes(b"{not a binary deck at all}")
+    with pytest.raises(ValueError):
+        decks.load_deck(filepath)
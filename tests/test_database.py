@@ -0,0 +1,112 @@
+"""Test the SQLite storage backend."""
+from click.testing import CliRunner
+import pytest
+
+from flashcards import database, decks, main
+
+
+@pytest.fixture
+def sqlite_math_deck(sqlite_backend):
+    deck = decks.Deck("Basic Math", "For learning basic arithmetic.")
+    deck.cards = [
+        {"question": "2 + 2 = ?", "answer": "4"},
+        {"question": "2 + 3 = ?", "answer": "5"},
+    ]
+    deck.create_file()
+    deck.save()
+    return deck
+
+
+def test_get_backend_uses_env_var(sqlite_backend):
+    assert isinstance(sqlite_backend, database.SqliteBackend)
+
+
+def test_unknown_backend_raises_error(monkeypatch):
+    monkeypatch.setenv(decks.BACKEND_ENV_VAR, "csv")
+    with pytest.raises(ValueError):
+        decks.get_backend()
+
+
+def test_no_deck_file_is_written(sqlite_math_deck):
+    assert not sqlite_math_deck.filepath.exists()
+    assert database.database_path().exists()
+
+
+def test_create_redundant_deck_raises_error(sqlite_math_deck):
+    with pytest.raises(IOError):
+        sqlite_math_deck.create_file()
+
+
+def test_load_deck(sqlite_math_deck):
+    deck = decks.load_deck(sqlite_math_deck.filepath)
+    assert deck.name == "Basic Math"
+    assert deck.description == "For learning basic arithmetic."
+    assert deck.cards == sqlite_math_deck.cards
+
+
+def test_loading_non_existant_deck_raises_error(sqlite_backend):
+    with pytest.raises(FileNotFoundError):
+        decks.load_deck(decks.generate_deck_filepath("French"))
+
+
+def test_append_and_count_cards(sqlite_math_deck):
+    decks.append_card(sqlite_math_deck.filepath, {"question": "5x5", "answer": "25"})
+    assert decks.load_summary(sqlite_math_deck.filepath)["count"] == 3
+    assert decks.load_deck(sqlite_math_deck.filepath).cards[-1]["question"] == "5x5"
+
+
+def test_write_cards(sqlite_math_deck):
+    deck = decks.load_deck(sqlite_math_deck.filepath)
+    deck.cards[0].update(question="2 + 2?", answer="four")
+    deck.write_cards([deck.cards[0]])
+    deck = decks.load_deck(sqlite_math_deck.filepath)
+    assert (deck.cards[0]["question"], deck.cards[0]["answer"]) == ("2 + 2?", "four")
+    assert deck.cards[1] == sqlite_math_deck.cards[1]
+
+
+def test_card_ids_are_stored(sqlite_math_deck):
+    deck = decks.load_deck(sqlite_math_deck.filepath)
+    assert [card["id"] for card in deck.cards] == [card["id"] for card in sqlite_math_deck.cards]
+
+
+def test_selected_deck_link(sqlite_math_deck):
+    decks.link_selected_deck(sqlite_math_deck.filepath)
+    assert decks.load_deck(decks.selected_deck_path()).name == "Basic Math"
+
+
+def test_add_and_status_commands(sqlite_math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    result = runner.invoke(main.add, input="Square root of 25?\n5")
+    assert "Card added to the deck!" in result.output
+    result = runner.invoke(main.status_cmd)
+    assert "Number of cards: 3" in result.output
+
+
+def test_list_command(sqlite_math_deck):
+    result = CliRunner().invoke(main.list_decks)
+    assert "Basic Math (2 cards)" in result.output
+
+
+def test_migrate_command(math_deck, monkeypatch):
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    result = CliRunner().invoke(main.migrate)
+    assert "Imported deck: Basic Math (5 cards)" in result.output
+
+    monkeypatch.setenv(decks.BACKEND_ENV_VAR, "sqlite")
+    assert len(decks.load_deck(math_deck.filepath).cards) == 5
+
+
+def test_migrate_command_skips_corrupted_decks(create_storage_directory, storage_path):
+    (storage_path / "broken.json").write_text("{")
+    result = CliRunner().invoke(main.migrate)
+    assert "Problem loading deck in file broken.json" in result.output
+
+
+def test_scheduling_fields_are_stored(sqlite_math_deck):
+    deck = decks.load_deck(sqlite_math_deck.filepath)
+    deck.cards[0].update(ease=2.6, interval=1, repetitions=1, due=100)
+    deck.write_cards([deck.cards[0]])
+    card = decks.load_deck(sqlite_math_deck.filepath).cards[0]
+    assert (card["ease"], card["interval"], card["repetitions"], card["due"]) == (2.6, 1, 1, 100)
+    assert "due" not in decks.load_deck(sqlite_math_deck.filepath).cards[1]
@@ -1,4 +1,6 @@
 import getpass
+import json
+import os
 from pathlib import Path
 
 import pytest
@@ -136,3 +138,431 @@ def test_corrupted_deck_raises_error1(path):
 def test_corrupted_deck_raises_error2():
     with pytest.raises(ValueError):
         decks.load_deck(Path("tests/corrupted_decks/4.json"))
+
+
+def test_appended_card_is_loaded_from_journal(math_deck):
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    deck = decks.load_deck(math_deck.filepath)
+    assert len(deck.cards) == 5
+    assert deck.cards[-1]["question"] == "5x5"
+
+
+def test_append_card_does_not_rewrite_deck_file(math_deck):
+    contents = math_deck.filepath.read_text()
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    assert math_deck.filepath.read_text() == contents
+    assert decks.journal_path(math_deck.filepath).exists()
+
+
+def test_interrupted_journal_append_is_ignored(math_deck):
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    with open(decks.journal_path(math_deck.filepath), "a") as file:
+        file.write('{"question": "6x6", "ans')
+    deck = decks.load_deck(math_deck.filepath)
+    assert len(deck.cards) == 5
+
+
+def test_save_folds_journal_into_deck_file(math_deck):
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    decks.compact_deck(math_deck.filepath)
+    assert not decks.journal_path(math_deck.filepath).exists()
+    assert len(decks.load_deck(math_deck.filepath).cards) == 5
+
+
+@pytest.fixture
+def deck_without_ids_filepath(create_storage_directory):
+    """A deck file saved before cards had ids."""
+    filepath = decks.generate_deck_filepath("Misc")
+    with open(filepath, "w") as file:
+        json.dump(
+            {"name": "Misc", "description": "", "cards": [{"question": "Q", "answer": "A"}]}, file
+        )
+    return filepath
+
+
+def test_saved_cards_are_given_ids(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    assert all(card["id"] for card in deck.cards)
+    assert len({card["id"] for card in deck.cards}) == 4
+    assert deck.unsaved_ids is False
+
+
+def test_cards_without_ids_are_given_ids_on_load(deck_without_ids_filepath):
+    deck = decks.load_deck(deck_without_ids_filepath)
+    assert deck.cards[0]["id"]
+    assert deck.unsaved_ids is True
+
+
+def test_appended_card_is_given_id(math_deck):
+    card = {"question": "5x5", "answer": "25"}
+    decks.append_card(math_deck.filepath, card)
+    assert decks.load_deck(math_deck.filepath).cards[-1]["id"] == card["id"]
+
+
+def test_loaded_cards_are_cards(math_deck):
+    card = decks.load_deck(math_deck.filepath).cards[0]
+    assert isinstance(card, decks.Card)
+    assert (card.question, card.answer) == ("2 + 2 = ?", "4")
+    assert not hasattr(card, "__dict__")
+
+
+def test_card_acts_as_its_dict():
+    card = decks.Card.from_dict({"question": "Q", "answer": "A", "id": "1"})
+    assert card == {"question": "Q", "answer": "A", "id": "1"}
+    assert "due" not in card
+    assert card.get("ease", 2.5) == 2.5
+    with pytest.raises(KeyError):
+        card["interval"]
+
+    card.update(due=100)
+    del card["answer"]
+    assert card.to_dict() == {"question": "Q", "id": "1", "due": 100}
+
+
+def test_unknown_card_fields_are_kept(math_deck):
+    math_deck.cards.append({"question": "5x5", "answer": "25", "hint": "square"})
+    math_deck.save()
+    deck = decks.load_deck(math_deck.filepath)
+    assert deck.cards[-1]["hint"] == "square"
+    deck.save()
+    assert decks.load_deck(math_deck.filepath).cards[-1].extra == {"hint": "square"}
+
+
+def test_get_card(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    card = deck.cards[2]
+    assert deck.get_card(card["id"]) is card
+
+
+def test_get_missing_card_raises_error(math_deck):
+    with pytest.raises(KeyError):
+        decks.load_deck(math_deck.filepath).get_card("not-an-id")
+
+
+def test_written_card_is_journaled(math_deck):
+    contents = math_deck.filepath.read_text()
+    deck = decks.load_deck(math_deck.filepath)
+    deck.cards[1].update(question="2 + 3?", answer="five")
+    deck.write_cards([deck.cards[1]])
+
+    assert math_deck.filepath.read_text() == contents
+    deck = decks.load_deck(math_deck.filepath)
+    assert len(deck.cards) == 4
+    assert (deck.cards[1]["question"], deck.cards[1]["answer"]) == ("2 + 3?", "five")
+
+
+def test_written_card_only_edits_that_card(math_deck):
+    math_deck.cards.append({"question": "2 + 2 = ?", "answer": "4"})
+    math_deck.save()
+    deck = decks.load_deck(math_deck.filepath)
+    deck.cards[0].update(question="2 + 2?", answer="four")
+    deck.write_cards([deck.cards[0]])
+
+    deck = decks.load_deck(math_deck.filepath)
+    assert deck.cards[0]["answer"] == "four"
+    assert deck.cards[4]["answer"] == "4"
+
+
+def test_write_cards_saves_ids_given_on_load(deck_without_ids_filepath):
+    deck = decks.load_deck(deck_without_ids_filepath)
+    card_id = deck.cards[0]["id"]
+    card = deck.get_card(card_id)
+    card.update(question="Q?", answer="A!")
+    deck.write_cards([card])
+
+    deck = decks.load_deck(deck_without_ids_filepath)
+    assert deck.cards[0] == {"question": "Q?", "answer": "A!", "id": card_id}
+
+
+def test_journaled_edit_of_journaled_card_is_not_duplicated(math_deck):
+    card = {"question": "5x5", "answer": "25"}
+    decks.append_card(math_deck.filepath, card)
+    decks.get_backend().update_cards(math_deck.filepath, [{**card, "answer": "twenty-five"}])
+    decks.deck_cache.clear()
+    deck = decks.load_deck(math_deck.filepath)
+    assert len(deck.cards) == 5
+    assert deck.cards[4]["answer"] == "twenty-five"
+
+
+@pytest.fixture
+def journaled_math_deck(math_deck, monkeypatch):
+    """The math deck with a new card, an edit of a card in its file, and an edit of the new card,
+    read by the streaming reader a few characters at a time."""
+    monkeypatch.setattr(decks.DeckFileReader, "CHUNK_SIZE", 7)
+    deck = decks.load_deck(math_deck.filepath)
+    card = {"question": "5x5", "answer": "25"}
+    decks.append_card(math_deck.filepath, card)
+    deck.cards[1].update(answer="five")
+    deck.write_cards([deck.cards[1]])
+    decks.get_backend().update_cards(math_deck.filepath, [{**card, "answer": "twenty-five"}])
+    decks.deck_cache.clear()
+    return math_deck
+
+
+def test_stream_summary(journaled_math_deck):
+    assert decks.stream_summary(journaled_math_deck.filepath) == {
+        "name": "Basic Math",
+        "description": "For learning basic arithmetic.",
+        "count": 5,
+    }
+
+
+def test_stream_cards(journaled_math_deck):
+    cards = list(decks.stream_cards(journaled_math_deck.filepath))
+    assert cards == [card.to_dict() for card in decks.load_deck(journaled_math_deck.filepath).cards]
+    assert [card["answer"] for card in cards] == ["4", "five", "6", "7", "twenty-five"]
+
+
+@pytest.mark.parametrize(
+    "contents, error",
+    [
+        ('{"name": "Math", "description": "", "cards": [{"question": "1"', json.JSONDecodeError),
+        ('{"name": "Math", "description": "", "cards": []} []', json.JSONDecodeError),
+        ('{"name": "Math", "cards": []}', KeyError),
+        ('{"name": "Math", "description": "", "cards": {}}', ValueError),
+    ],
+)
+def test_stream_checks_deck_file(math_deck, contents, error):
+    math_deck.filepath.write_text(contents)
+    with pytest.raises(error):
+        decks.stream_summary(math_deck.filepath)
+
+
+def test_summaries_of_large_decks_are_streamed(math_deck, monkeypatch):
+    monkeypatch.setattr(decks, "LARGE_DECK_SIZE", 0)
+    monkeypatch.setattr(decks.JsonBackend, "load", None)  # a deck that was loaded would fail
+    decks.write_index({})
+    assert decks.load_summary(math_deck.filepath)["count"] == 4
+
+
+def test_save_updates_deck_index(math_deck):
+    entry = decks.read_index()["basic-math.json"]
+    assert entry["name"] == "Basic Math"
+    assert entry["count"] == 4
+
+
+def test_summary_is_read_from_index_without_loading_deck(math_deck, monkeypatch):
+    def fail(self, filepath):
+        raise AssertionError("deck should not be loaded")
+
+    monkeypatch.setattr(decks.JsonBackend, "load", fail)
+    summary = decks.load_summary(math_deck.filepath)
+    assert summary == {"name": "Basic Math", "description": math_deck.description, "count": 4}
+
+
+def test_summary_reloads_deck_changed_outside_app(math_deck):
+    content = json.loads(math_deck.filepath.read_text())
+    content["cards"].append({"question": "5x5", "answer": "25"})
+    math_deck.filepath.write_text(json.dumps(content))
+    assert decks.load_summary(math_deck.filepath)["count"] == 5
+
+
+def test_appended_card_keeps_index_current(math_deck, monkeypatch):
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+
+    def fail(self, filepath):
+        raise AssertionError("deck should not be loaded")
+
+    monkeypatch.setattr(decks.JsonBackend, "load", fail)
+    assert decks.load_summary(math_deck.filepath)["count"] == 5
+
+
+def test_corrupted_index_is_rebuilt(math_deck):
+    decks.index_path().write_text("{")
+    assert decks.load_summary(math_deck.filepath)["count"] == 4
+    assert decks.read_index()["basic-math.json"]["count"] == 4
+
+
+def test_load_decks_keeps_order(math_deck, german_deck, italian_deck):
+    paths = [italian_deck.filepath, math_deck.filepath, german_deck.filepath]
+    results = decks.load_decks(paths)
+    assert [path for path, deck in results] == paths
+    assert [deck.name for path, deck in results] == ["Italian", "Basic Math", "German"]
+
+
+def test_load_decks_returns_errors_per_deck(math_deck):
+    paths = [Path("tests/corrupted_decks/1.json"), math_deck.filepath, Path("missing.json")]
+    results = decks.load_decks(paths)
+    assert isinstance(results[0][1], KeyError)
+    assert results[1][1].name == "Basic Math"
+    assert isinstance(results[2][1], FileNotFoundError)
+
+
+def test_card_that_is_not_an_object_raises_value_error(storage_path, create_storage_directory):
+    deck_path = storage_path / "broken.json"
+    deck_path.write_text('{"name": "Broken", "description": "", "cards": ["one", "two"]}')
+    [(_, error)] = decks.load_decks([deck_path])
+    assert isinstance(error, ValueError)
+    assert "a card should be an object, not str" in str(error)
+
+
+def test_load_summaries_returns_errors_per_deck(math_deck):
+    results = decks.load_summaries([Path("tests/corrupted_decks/2.json"), math_deck.filepath])
+    assert isinstance(results[0][1], KeyError)
+    assert results[1][1]["count"] == 4
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def codec(request, monkeypatch):
+    """Run a test with orjson (if installed) and with the standard library json module."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(decks, "orjson", None)
+        monkeypatch.setattr(decks, "orjson_imported", True)
+    return request.param
+
+
+@pytest.mark.parametrize("deck_format", ["indented", "compact"])
+def test_save_and_load_round_trip(codec, deck_format, math_deck, monkeypatch):
+    monkeypatch.setenv(decks.FORMAT_ENV_VAR, deck_format)
+    math_deck.cards.append({"question": "Ça va? 你好 🙂", "answer": 'Bien, "merci"\n\\o/'})
+    math_deck.save()
+    decks.append_card(math_deck.filepath, {"question": "Grüße", "answer": "Tschüss"})
+
+    deck = decks.load_deck(math_deck.filepath)
+    assert deck.to_dict() == {**math_deck.to_dict(), "cards": deck.cards}
+    assert deck.cards[:5] == math_deck.cards
+    assert deck.cards[5]["answer"] == "Tschüss"
+
+
+def test_compact_format_has_no_indentation(codec, math_deck, monkeypatch):
+    monkeypatch.setenv(decks.FORMAT_ENV_VAR, "compact")
+    math_deck.save()
+    assert "\n" not in math_deck.filepath.read_text()
+
+
+def test_decks_saved_by_either_codec_can_be_loaded_by_the_other(math_deck, monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    math_deck.save()
+    monkeypatch.setattr(decks, "orjson", None)
+    monkeypatch.setattr(decks, "orjson_imported", True)
+    assert decks.load_deck(math_deck.filepath).cards == math_deck.cards
+
+    math_deck.save()
+    monkeypatch.setattr(decks, "orjson", orjson)
+    assert decks.load_deck(math_deck.filepath).cards == math_deck.cards
+
+
+def test_corrupted_json_raises_json_decode_error(codec):
+    with pytest.raises(json.decoder.JSONDecodeError):
+        decks.decode(b'{"name": ')
+
+
+def test_unknown_deck_format_raises_error(monkeypatch):
+    monkeypatch.setenv(decks.FORMAT_ENV_VAR, "yaml")
+    with pytest.raises(ValueError):
+        decks.compact_format()
+
+
+def test_interrupted_save_leaves_deck_intact(math_deck, monkeypatch):
+    contents = math_deck.filepath.read_text()
+
+    def crash(source, destination):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(decks.os, "replace", crash)
+    math_deck.cards.append({"question": "5x5", "answer": "25"})
+    with pytest.raises(KeyboardInterrupt):
+        math_deck.save()
+
+    assert math_deck.filepath.read_text() == contents
+    assert [path.name for path in math_deck.filepath.parent.glob("*.tmp")] == []
+
+
+def test_save_keeps_file_permissions(math_deck):
+    math_deck.filepath.chmod(0o640)
+    math_deck.save()
+    assert math_deck.filepath.stat().st_mode & 0o777 == 0o640
+
+
+def test_new_file_permissions_follow_umask(create_storage_directory):
+    filepath = decks.storage_path() / "new.json"
+    umask = os.umask(0o027)
+    try:
+        decks.write_atomically(filepath, b"{}")
+    finally:
+        os.umask(umask)
+    assert filepath.stat().st_mode & 0o777 == 0o640
+
+
+def test_no_backup_by_default(math_deck):
+    math_deck.save()
+    assert not decks.backup_path(math_deck.filepath).exists()
+
+
+def test_save_keeps_backup_of_previous_version(math_deck, monkeypatch):
+    monkeypatch.setenv(decks.BACKUP_ENV_VAR, "1")
+    contents = math_deck.filepath.read_text()
+    math_deck.cards.append({"question": "5x5", "answer": "25"})
+    math_deck.save()
+    assert decks.backup_path(math_deck.filepath).read_text() == contents
+
+
+def test_corrupted_deck_is_recovered_from_backup(math_deck, monkeypatch):
+    monkeypatch.setenv(decks.BACKUP_ENV_VAR, "1")
+    math_deck.save()
+    math_deck.filepath.write_text('{"name": "Basic Math", "cards": [')
+
+    deck = decks.load_deck(math_deck.filepath)
+    assert len(deck.cards) == 4
+
+
+def test_corrupted_deck_without_backup_raises_error(math_deck):
+    math_deck.filepath.write_text('{"name": "Basic Math", "cards": [')
+    with pytest.raises(json.decoder.JSONDecodeError):
+        decks.load_deck(math_deck.filepath)
+
+
+@pytest.fixture
+def deck_cache(monkeypatch):
+    monkeypatch.setattr(decks, "deck_cache", decks.DeckCache())
+    return decks.deck_cache
+
+
+def test_cached_deck_is_returned_while_unchanged(math_deck, deck_cache):
+    deck = decks.load_deck(math_deck.filepath)
+    assert decks.load_deck(math_deck.filepath) is deck
+    assert decks.load_decks([math_deck.filepath]) == [(math_deck.filepath, deck)]
+
+
+def test_cached_deck_is_reloaded_when_changed_outside(math_deck, deck_cache):
+    deck = decks.load_deck(math_deck.filepath)
+    content = json.loads(math_deck.filepath.read_text())
+    content["cards"].append({"question": "5x5", "answer": "25"})
+    math_deck.filepath.write_text(json.dumps(content))
+    reloaded = decks.load_deck(math_deck.filepath)
+    assert reloaded is not deck
+    assert len(reloaded.cards) == 5
+
+
+def test_cached_deck_follows_changes_made_in_process(math_deck, deck_cache):
+    deck = decks.load_deck(math_deck.filepath)
+    decks.append_card(math_deck.filepath, {"question": "5x5", "answer": "25"})
+    deck.cards[0].update(answer="four")
+    deck.write_cards([deck.cards[0]])
+
+    assert decks.load_deck(math_deck.filepath) is deck
+    assert len(deck.cards) == 5
+    deck_cache.clear()
+    reloaded = decks.load_deck(math_deck.filepath)
+    assert reloaded.cards == deck.cards
+
+
+def test_least_recently_used_deck_is_evicted(math_deck, german_deck, monkeypatch):
+    monkeypatch.setattr(decks, "deck_cache", decks.DeckCache(max_size=1))
+    math = decks.load_deck(math_deck.filepath)
+    decks.load_deck(german_deck.filepath)
+    assert list(decks.deck_cache.decks) == [german_deck.filepath.resolve()]
+    assert decks.load_deck(math_deck.filepath) is not math
+
+
+def test_cache_size_of_zero_turns_caching_off(math_deck, deck_cache, monkeypatch):
+    monkeypatch.setenv(decks.CACHE_SIZE_ENV_VAR, "0")
+    assert decks.load_deck(math_deck.filepath) is not decks.load_deck(math_deck.filepath)
+
+
+def test_invalid_cache_size_raises_error(math_deck, deck_cache, monkeypatch):
+    monkeypatch.setenv(decks.CACHE_SIZE_ENV_VAR, "lots")
+    with pytest.raises(ValueError):
+        decks.load_deck(math_deck.filepath)
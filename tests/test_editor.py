@@ -11,11 +11,18 @@ import pytest
 from flashcards.editor import (
     Q_INSTRUCTION,
     A_INSTRUCTION,
+    CARD_INSTRUCTION,
     edit_card,
+    edit_cards,
+    parse_cards,
     prompt_via_editor,
     remove_instructions,
 )
-from flashcards.exceptions import InstructionsRemovedException
+from flashcards.exceptions import (
+    BatchFormatException,
+    InstructionsRemovedException,
+    NoEditsMadeException,
+)
 
 
 def test_remove_instructions():
@@ -82,3 +89,70 @@ Because
 
     assert card["question"] == "Why?"
     assert card["answer"] == "Because"
+
+
+def test_parse_cards():
+    content = """What is 2 + 2?
+---
+4
+===
+Name the
+primary colors.
+---
+red
+# an instruction line
+yellow
+blue
+===
+"""
+    assert parse_cards(content) == [
+        {"question": "What is 2 + 2?", "answer": "4"},
+        {"question": "Name the\nprimary colors.", "answer": "red\nyellow\nblue"},
+    ]
+
+
+def test_parse_cards_of_empty_content():
+    assert parse_cards("\n# Write cards above.\n") == []
+
+
+def test_card_without_answer_raises_exception():
+    with pytest.raises(BatchFormatException, match="Card 2"):
+        parse_cards("1 + 1?\n---\n2\n===\n1 + 2?\n===\n1 + 3?\n---\n4")
+
+
+CARDS = [
+    {"id": "a1", "question": "Why?", "answer": "Because"},
+    {"id": "b2", "question": "How?", "answer": "Like so"},
+]
+
+
+def cards_buffer(*texts):
+    lines = []
+    for (card_id, field), text in zip(
+        [("a1", "question"), ("a1", "answer"), ("b2", "question"), ("b2", "answer")], texts
+    ):
+        lines += [text, CARD_INSTRUCTION.format(field=field, card_id=card_id)]
+    return "\n".join(lines) + "\n"
+
+
+@patch("flashcards.editor.prompt_via_editor")
+def test_edit_cards_returns_only_changed_cards(mock_editor_function):
+    mock_editor_function.return_value = cards_buffer("Why?", "Because", "How\nexactly?", "Like so")
+    assert edit_cards(CARDS) == [(CARDS[1], {"question": "How\nexactly?", "answer": "Like so"})]
+    buffer = mock_editor_function.call_args[0][0]
+    assert buffer == cards_buffer("Why?", "Because", "How?", "Like so")
+
+
+@patch("flashcards.editor.prompt_via_editor")
+def test_edit_cards_without_edits_raises_exception(mock_editor_function):
+    mock_editor_function.side_effect = lambda filecontents: filecontents
+    with pytest.raises(NoEditsMadeException):
+        edit_cards(CARDS)
+
+
+@patch("flashcards.editor.prompt_via_editor")
+def test_edit_cards_with_removed_marker_raises_exception(mock_editor_function):
+    buffer = cards_buffer("Why?", "Because", "How?", "Like so")
+    mock_editor_function.return_value = buffer.replace("card b2", "card b3")
+    with pytest.raises(InstructionsRemovedException):
+        edit_cards(CARDS)
@@ -81,6 +81,16 @@ def test_error_message_if_multiple_decks_have_no_cards(
     assert "no cards to study" in result.output
 
 
+def test_study_all_decks(math_deck, german_deck, italian_deck):
+    italian_deck.cards = [{"question": "Ciao?", "answer": "Hello"}]
+    italian_deck.save()
+    runner = CliRunner()
+    result = runner.invoke(main.study_cmd, ["all"])
+    assert "QUESTION 5 / 5" in result.output
+    assert "Ciao?" in result.output
+    assert "All done!" in result.output
+
+
 def test_pressing_q_quits_session(math_deck):
     runner = CliRunner()
     result = runner.invoke(main.study_cmd, ["Basic Math", "-o"], input="jq")
@@ -90,6 +100,85 @@ def test_pressing_q_quits_session(math_deck):
     assert "All done!" not in result.output  # should not reach the end
 
 
+def test_grading_card_schedules_it(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.study_cmd, ["Basic Math", "-o"], input="4q")
+    card = decks.load_deck(math_deck.filepath).cards[0]
+    assert card["repetitions"] == 1
+    assert card["interval"] == 1
+
+
+def test_study_with_seed_is_repeatable(math_deck):
+    runner = CliRunner()
+    first = runner.invoke(main.study_cmd, ["Basic Math", "--seed", "42"], input="    ")
+    second = runner.invoke(main.study_cmd, ["Basic Math", "--seed", "42"], input="    ")
+    assert "All done!" in first.output
+    assert first.output == second.output
+
+
+def test_resume_study_session(math_deck):
+    runner = CliRunner()
+    first = runner.invoke(main.study_cmd, ["Basic Math", "-o"], input="44q")
+    assert "QUESTION 3 / 4" in first.output
+    result = runner.invoke(main.study_cmd, ["--resume"], input="  ")
+    assert "QUESTION 2 / 4" not in result.output
+    assert "QUESTION 3 / 4" in result.output
+    assert "2 + 4 = ?" in result.output
+    assert "All done!" in result.output
+
+    result = runner.invoke(main.study_cmd, ["--resume"])
+    assert "There is no study session to resume." in result.output
+
+
+def test_resume_studies_the_deck_that_was_selected(math_deck, german_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    runner.invoke(main.study_cmd, ["-o"], input="4q")
+    runner.invoke(main.select, ["German"])
+    result = runner.invoke(main.study_cmd, ["--resume"], input=" ")
+    assert "QUESTION 2 / 4 (Basic Math deck)" in result.output
+
+
+def test_resume_reports_changed_deck(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.study_cmd, ["Basic Math", "-o"], input="4q")
+    decks.append_card(math_deck.filepath, {"question": "5 x 5 = ?", "answer": "25"})
+    result = runner.invoke(main.study_cmd, ["--resume"])
+    assert "had 4 cards when the session began; now 5" in result.output
+    assert "can't be resumed" in result.output
+    assert "QUESTION" not in result.output
+
+
+def test_resume_takes_no_other_options(math_deck):
+    result = CliRunner().invoke(main.study_cmd, ["Basic Math", "--resume"])
+    assert result.exit_code == 2
+    assert "takes no other options" in result.output
+
+
+def test_grades_are_saved_when_session_is_quit(math_deck):
+    CliRunner().invoke(main.study_cmd, ["Basic Math", "-o"], input="4 3q")
+    assert len(decks.read_journal(math_deck.filepath)) == 2
+    decks.deck_cache.clear()
+    cards = decks.load_deck(math_deck.filepath).cards
+    assert [card.get("repetitions") for card in cards] == [1, None, 1, None]
+
+
+def test_study_due_cards(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.study_cmd, ["Basic Math", "-o"], input="34q")
+    result = runner.invoke(main.study_cmd, ["Basic Math", "--due"])
+    assert "QUESTION 1 / 2" in result.output
+    assert "2 + 2 = ?" not in result.output
+    assert "2 + 3 = ?" not in result.output
+
+
+def test_study_due_cards_when_none_are_due(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.study_cmd, ["Basic Math"], input="3333")
+    result = runner.invoke(main.study_cmd, ["Basic Math", "--due"])
+    assert "There are no cards due for review." in result.output
+
+
 def test_pressing_e_enters_editor(create_storage_directory, math_deck):
     """User edits first question and then quits after second question."""
     runner = CliRunner()
@@ -197,6 +286,15 @@ def test_add_card_successful(math_deck):
     assert "Card added to the deck!" in result.output
 
 
+def test_added_card_is_in_deck(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    runner.invoke(main.add, input="Square root of 25?\n5")
+    deck = decks.load_deck(math_deck.filepath)
+    assert deck.cards[-1]["question"] == "Square root of 25?"
+    assert deck.cards[-1]["answer"] == "5"
+
+
 def test_add_card_returns_error_message_if_no_deck_selected(math_deck):
     runner = CliRunner()
     result = runner.invoke(main.add, input="Square root of 25?\n5")
@@ -211,6 +309,254 @@ def test_check_if_no_editor_env_var_and_no_vim_returns_error_message(math_deck):
     assert "Could not open" in result.output
 
 
+def test_add_batch_from_stdin(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    result = runner.invoke(main.add, ["--batch"], input="5 x 5?\n---\n25\n===\n6 x 6?\n---\n36\n")
+    assert "2 cards added to the deck!" in result.output
+    deck = decks.load_deck(math_deck.filepath)
+    assert [card["answer"] for card in deck.cards[-2:]] == ["25", "36"]
+
+
+def test_add_batch_writes_once(math_deck, monkeypatch):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    writes = []
+    monkeypatch.setattr(
+        decks.JsonBackend, "append_cards", lambda self, path, cards: writes.append(cards)
+    )
+    runner.invoke(
+        main.add, ["--batch"], input="===\n".join(f"{i}?\n---\n{i}\n" for i in range(100))
+    )
+    assert [len(cards) for cards in writes] == [100]
+
+
+@patch("flashcards.editor.prompt_via_editor")
+def test_add_batch_from_editor(mock_editor_function, math_deck):
+    mock_editor_function.return_value = "5 x 5?\n---\n25\n# Write cards above."
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    result = runner.invoke(main.add, ["--batch", "-e"])
+    assert "1 cards added" in result.output
+    assert mock_editor_function.call_count == 1
+
+
+def test_add_batch_with_missing_answer_adds_nothing(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    result = runner.invoke(main.add, ["--batch"], input="5 x 5?\n---\n25\n===\n6 x 6?\n")
+    assert "Card 2 has no question or no answer. No cards added." in result.output
+    assert len(decks.load_deck(math_deck.filepath).cards) == 4
+
+
+##############
+# edit command
+
+
+def edit_buffer_answers(monkeypatch, *answers):
+    """Have the editor change the answers of the cards in its buffer, in order."""
+    from flashcards import editor
+
+    def edit(filecontents):
+        lines = filecontents.split("\n")
+        instructions = [i for i, line in enumerate(lines) if "Edit the answer" in line]
+        for i, answer in zip(instructions, answers):
+            lines[i - 1] = answer
+        return "\n".join(lines)
+
+    monkeypatch.setattr(editor, "prompt_via_editor", edit)
+
+
+def test_edit_matching_cards_in_one_write(math_deck, monkeypatch):
+    writes = []
+    update_cards = decks.JsonBackend.update_cards
+
+    def record(self, filepath, cards):
+        writes.append([card["answer"] for card in cards])
+        update_cards(self, filepath, cards)
+
+    monkeypatch.setattr(decks.JsonBackend, "update_cards", record)
+    decks.load_deck(math_deck.filepath).save()  # so the cards have ids
+    edit_buffer_answers(monkeypatch, "four", "5")  # 2 + 3 = ? is left as it was
+
+    result = CliRunner().invoke(main.edit_cmd, ["Basic Math", "--match", r"\+ [23]"])
+    assert "1 cards edited." in result.output
+    assert writes == [["four"]]
+    decks.deck_cache.clear()
+    assert [card["answer"] for card in decks.load_deck(math_deck.filepath).cards][:2] == [
+        "four",
+        "5",
+    ]
+
+
+def test_edit_with_removed_marker(math_deck, monkeypatch):
+    from flashcards import editor
+
+    monkeypatch.setattr(editor, "prompt_via_editor", lambda filecontents: "deleted it all")
+    result = CliRunner().invoke(main.edit_cmd, ["Basic Math"])
+    assert "an instruction line was edited or deleted" in result.output
+
+
+def test_edit_with_no_matching_cards(math_deck):
+    result = CliRunner().invoke(main.edit_cmd, ["Basic Math", "--match", "nothing like this"])
+    assert "No cards to edit." in result.output
+
+
+#########################
+# import / export commands
+
+
+def test_import_cards_from_csv(math_deck, tmp_path):
+    csv_file = tmp_path / "cards.csv"
+    csv_file.write_text("question,answer\n3 + 3 = ?,6\n3 + 4 = ?,7\n")
+    result = CliRunner().invoke(main.import_cmd, ["Basic Math", str(csv_file)])
+    assert "Imported 2 cards." in result.output
+    deck = decks.load_deck(math_deck.filepath)
+    assert [card["answer"] for card in deck.cards[4:]] == ["6", "7"]
+    assert not decks.journal_path(math_deck.filepath).exists()
+
+
+def test_import_appends_a_chunk_at_a_time(math_deck, tmp_path, monkeypatch):
+    monkeypatch.setattr("flashcards.transfer.CHUNK_SIZE", 2)
+    appended = []
+    monkeypatch.setattr(decks, "append_cards", lambda path, cards: appended.append(len(cards)))
+    result = CliRunner().invoke(
+        main.import_cmd, ["Basic Math", "-", "--format", "tsv"], input="a\tb\nc\td\ne\tf\n"
+    )
+    assert "Imported 3 cards." in result.output
+    assert appended == [2, 1]
+
+
+def test_import_stops_at_bad_line(math_deck, tmp_path):
+    jsonl_file = tmp_path / "cards.jsonl"
+    jsonl_file.write_text('{"question": "Q", "answer": "A"}\n{"question": "Q"}\n')
+    result = CliRunner().invoke(main.import_cmd, ["Basic Math", str(jsonl_file)])
+    assert "Line 2: expected a question and an answer. Import stopped there." in result.output
+    assert "Imported 1 cards." in result.output
+
+
+def test_import_unknown_format_returns_error_message(math_deck, tmp_path):
+    other_file = tmp_path / "cards.xlsx"
+    other_file.write_text("")
+    result = CliRunner().invoke(main.import_cmd, ["Basic Math", str(other_file)])
+    assert "Unknown file format" in result.output
+
+
+def test_import_into_missing_deck_returns_error_message(math_deck, tmp_path):
+    csv_file = tmp_path / "cards.csv"
+    csv_file.write_text("Q,A\n")
+    result = CliRunner().invoke(main.import_cmd, ["Nonexistent", str(csv_file)])
+    assert "No deck by that name found" in result.output
+
+
+def test_export_deck_to_csv(math_deck):
+    result = CliRunner().invoke(main.export_cmd, ["Basic Math"])
+    assert result.output.splitlines() == [
+        "question,answer",
+        "2 + 2 = ?,4",
+        "2 + 3 = ?,5",
+        "2 + 4 = ?,6",
+        "2 + 5 = ?,7",
+    ]
+
+
+def test_export_then_import_round_trip(math_deck, german_deck, tmp_path):
+    output = tmp_path / "math.jsonl"
+    CliRunner().invoke(main.export_cmd, ["Basic Math", "-o", str(output)])
+    CliRunner().invoke(main.import_cmd, ["German", str(output)])
+    cards = decks.load_deck(german_deck.filepath).cards
+    assert [card["question"] for card in cards] == [card["question"] for card in math_deck.cards]
+
+
+def test_export_without_selected_deck_returns_error_message(math_deck):
+    result = CliRunner().invoke(main.export_cmd)
+    assert "No deck currently selected" in result.output
+
+
+################
+# compact command
+
+
+def test_compact_selected_deck(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    runner.invoke(main.add, input="Square root of 25?\n5")
+    result = runner.invoke(main.compact)
+    assert "Compacted deck: Basic Math" in result.output
+    assert not decks.journal_path(math_deck.filepath).exists()
+    assert len(decks.load_deck(math_deck.filepath).cards) == 5
+
+
+def test_compact_all_skips_corrupted_decks(math_deck, storage_path):
+    (storage_path / "a-broken.json").write_text("{")
+    (storage_path / "b-broken.json").write_text('{"name": "B", "cards": []}')
+    decks.append_card(math_deck.filepath, {"question": "5 x 5 = ?", "answer": "25"})
+    result = CliRunner().invoke(main.compact, ["all"])
+    assert "Problem loading deck in file a-broken.json; ignored." in result.output
+    assert "'description' key is missing" in result.output
+    assert "Compacted deck: Basic Math" in result.output
+    assert not decks.journal_path(math_deck.filepath).exists()
+
+
+def test_compact_all_skips_deck_whose_cards_are_not_a_list(math_deck, storage_path):
+    (storage_path / "a-broken.json").write_text('{"name": "A", "description": "", "cards": "x"}')
+    decks.append_card(math_deck.filepath, {"question": "5 x 5 = ?", "answer": "25"})
+    result = CliRunner().invoke(main.compact, ["all"])
+    assert "a-broken.json; ignored." in result.output
+    assert "'cards' value should be a list." in result.output
+    assert "Compacted deck: Basic Math" in result.output
+    assert not decks.journal_path(math_deck.filepath).exists()
+
+
+def test_compact_without_selected_deck_returns_error_message(math_deck):
+    runner = CliRunner()
+    result = runner.invoke(main.compact)
+    assert "No deck currently selected" in result.output
+
+
+################
+# convert command
+
+
+def test_convert_selected_deck_to_binary(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.select, ["Basic Math"])
+    result = runner.invoke(main.convert)
+    assert "Deck Basic Math is stored in basic-math.fcb." in result.output
+    assert decks.is_binary_deck(decks.selected_deck_path())
+
+
+def test_convert_to_sharded_deck(math_deck):
+    runner = CliRunner()
+    result = runner.invoke(main.convert, ["Basic Math", "--to", "sharded", "--shard-size", "3"])
+    assert "Deck Basic Math is stored in basic-math.deck." in result.output
+    assert sorted(path.name for path in decks.generate_deck_filepath("Basic Math").iterdir()) == [
+        "000000.json",
+        "000001.json",
+        "manifest.json",
+    ]
+
+    result = runner.invoke(main.list_decks)
+    assert "Basic Math (4 cards)" in result.output
+    result = runner.invoke(main.study_cmd, ["Basic Math", "--ordered"], input="    ")
+    assert "QUESTION 4 / 4 (Basic Math deck)" in result.output
+    assert "2 + 5 = ?" in result.output
+
+
+def test_study_binary_deck(math_deck):
+    runner = CliRunner()
+    runner.invoke(main.convert, ["Basic Math"])
+    result = runner.invoke(main.study_cmd, ["Basic Math", "--ordered"], input="4")
+    assert "QUESTION 1 / 4 (Basic Math deck)" in result.output
+    assert "2 + 2 = ?" in result.output
+    assert decks.load_deck(decks.generate_deck_filepath("Basic Math")).cards[0]["repetitions"] == 1
+
+
+def test_convert_missing_deck_returns_error_message(math_deck):
+    result = CliRunner().invoke(main.convert, ["Nonexistent"])
+    assert "No deck by that name found" in result.output
+
+
 ######################
 # list decks command
 
@@ -231,6 +577,13 @@ def test_list_multiple_decks_successful(math_deck, german_deck):
     )
 
 
+def test_list_skips_corrupted_decks(math_deck, storage_path):
+    (storage_path / "broken.json").write_text("{")
+    result = CliRunner().invoke(main.list_decks)
+    assert "Problem loading deck in file broken.json; ignored." in result.output
+    assert "Basic Math (4 cards)" in result.output
+
+
 def test_error_message_if_no_decks_after_list_command(create_storage_directory):
     runner = CliRunner()
     result = runner.invoke(main.list_decks)
@@ -245,3 +598,54 @@ def test_decks_listed_in_alpha_order(german_deck, math_deck):
 @pytest.mark.xfail
 def test_error_message_if_deck_missing_key():
     assert 0
+
+
+################
+# shell command
+
+
+def test_shell_runs_commands_until_exit(math_deck):
+    result = CliRunner().invoke(
+        main.shell, input="select 'Basic Math'\nstatus\nadd\n5x5\n25\nstatus\nexit\nlist\n"
+    )
+    assert "Selected deck: Basic Math" in result.output
+    assert "Number of cards: 4" in result.output
+    assert "Number of cards: 5" in result.output
+    assert "Your decks:" not in result.output
+
+
+def test_shell_reports_errors_and_continues(math_deck):
+    result = CliRunner().invoke(main.shell, input="nonsense\nstudy 'Nonexistent'\nlist\n")
+    assert "No such command" in result.output
+    assert "No deck by that name found." in result.output
+    assert "Basic Math" in result.output
+    assert result.exit_code == 0
+
+
+def test_shell_reports_unexpected_errors_and_continues(math_deck, monkeypatch):
+    monkeypatch.setenv(decks.BACKEND_ENV_VAR, "nonsense")
+    result = CliRunner().invoke(main.shell, input="list\nstatus\n")
+    assert result.output.count("Unknown storage backend 'nonsense'") == 2
+    assert result.exit_code == 0
+
+
+def test_shell_refuses_batch_add_from_stdin(math_deck):
+    result = CliRunner().invoke(
+        main.shell, input="select 'Basic Math'\nadd --batch\nq\n---\na\nstatus\n"
+    )
+    assert "use add --batch -e" in result.output
+    assert "Number of cards: 4" in result.output
+
+
+def test_shell_keeps_decks_loaded(math_deck, monkeypatch):
+    loads = []
+    load_uncached = decks.JsonBackend.load_uncached
+    monkeypatch.setattr(
+        decks.JsonBackend,
+        "load_uncached",
+        lambda self, filepath: loads.append(filepath) or load_uncached(self, filepath),
+    )
+    CliRunner().invoke(
+        main.shell, input="select 'Basic Math'\nselect 'Basic Math'\nstudy -o\nq\nexit\n"
+    )
+    assert len(loads) == 1
@@ -0,0 +1,67 @@
+"""Test the profiling of commands."""
+import json
+import pstats
+
+from click.testing import CliRunner
+
+from flashcards import decks, main, profiling
+
+
+def test_phases_are_not_recorded_unless_profiling():
+    with profiling.phase("load"):
+        profiling.count_bytes(read=10)
+    assert profiling.profile is None
+
+
+def test_nested_phases_count_bytes_towards_each():
+    profiling.start()
+    with profiling.phase("scan"):
+        with profiling.phase("load"):
+            profiling.count_bytes(read=10)
+        profiling.count_bytes(written=5)
+    profile = profiling.stop()
+
+    phases = [(name, calls, read, written) for name, calls, _, read, written in profile.summary()]
+    assert phases == [("load", 1, 10, 0), ("scan", 1, 10, 5)]
+    assert (profile.bytes_read, profile.bytes_written) == (10, 5)
+    assert profiling.profile is None
+
+
+def test_profile_option_prints_phases(math_deck):
+    decks.deck_cache.clear()
+    result = CliRunner().invoke(main.cli, ["--profile", "study", "Basic Math", "-o"], input="4q")
+    lines = {line.split()[0]: line.split()[1:] for line in result.output.splitlines() if line}
+    assert "phase" in lines
+    assert lines["load"][0] == "1"
+    assert int(lines["load"][2]) == math_deck.filepath.stat().st_size
+    assert int(lines["flush"][3]) > 0  # the grade was written to the journal
+    assert "total" in lines
+
+
+def test_profile_option_prints_phases_of_status(math_deck):
+    decks.deck_cache.clear()
+    CliRunner().invoke(main.cli, ["select", "Basic Math"])
+    result = CliRunner().invoke(main.cli, ["--profile", "status"])
+    lines = {line.split()[0]: line.split()[1:] for line in result.output.splitlines() if line}
+    assert lines["scan"][0] == "1"
+
+
+def test_profile_env_var(math_deck, monkeypatch):
+    monkeypatch.setenv("FLASHCARDS_PROFILE", "1")
+    result = CliRunner().invoke(main.cli, ["list"])
+    assert "Basic Math" in result.output
+    assert "scan" in result.output
+
+
+def test_trace_file(math_deck, tmp_path):
+    trace = tmp_path / "trace.json"
+    CliRunner().invoke(main.cli, ["--profile-output", str(trace), "list"])
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert {event["name"] for event in events} >= {"scan"}
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+
+def test_cprofile_stats_file(math_deck, tmp_path):
+    stats = tmp_path / "list.prof"
+    CliRunner().invoke(main.cli, ["--profile-output", str(stats), "list"])
+    assert any("list_decks" in function for _, _, function in pstats.Stats(str(stats)).stats)
@@ -0,0 +1,124 @@
+"""Test the full-text search of cards."""
+from click.testing import CliRunner
+import pytest
+
+from flashcards import decks, main, search
+
+
+@pytest.fixture
+def vocab_deck(create_storage_directory):
+    deck = decks.Deck("Vocabulary", "Words")
+    deck.cards = [
+        {"question": "What is a multiplication table?", "answer": "A grid of products."},
+        {"question": "Define café", "answer": "A small restaurant serving coffee."},
+        {"question": "What is a table?", "answer": "Furniture with a flat top."},
+        {"question": "What is a grid?", "answer": "A table of rows and columns."},
+    ]
+    deck.create_file()
+    deck.save()
+    return deck
+
+
+def questions(results):
+    return [question for _, question, _ in results]
+
+
+def test_first_search_builds_index(vocab_deck):
+    assert not search.search_index_path().exists()
+    assert questions(search.search("furniture")) == ["What is a table?"]
+    assert search.search_index_path().exists()
+
+
+def test_search_matches_word_prefixes(vocab_deck):
+    assert questions(search.search("mult tab")) == ["What is a multiplication table?"]
+
+
+def test_search_ignores_case_and_accents(vocab_deck):
+    assert questions(search.search("CAFE")) == ["Define café"]
+
+
+def test_matches_in_question_rank_first(vocab_deck):
+    results = questions(search.search("table"))
+    assert results[-1] == "What is a grid?"
+    assert len(results) == 3
+
+
+def test_best_match_is_found_among_many(create_storage_directory):
+    deck = decks.Deck("Fruit", "")
+    deck.cards = [
+        {"question": f"Card {i} about fruit, orchards and an apple", "answer": "Not much."}
+        for i in range(1500)
+    ]
+    deck.cards.append({"question": "apple", "answer": "apple"})
+    deck.create_file()
+    deck.save()
+    assert questions(search.search("apple", limit=1)) == ["apple"]
+
+
+def test_search_spans_decks(vocab_deck, math_deck):
+    results = search.search("what")
+    assert {deck_name for deck_name, _, _ in results} == {"Vocabulary"}
+    assert search.search("2")[0][0] == "Basic Math"
+
+
+def test_search_without_words_finds_nothing(vocab_deck):
+    assert search.search("?!") == []
+
+
+def test_added_card_is_indexed(vocab_deck):
+    search.search("table")
+    decks.append_card(vocab_deck.filepath, {"question": "What is a chair?", "answer": "A seat."})
+    assert questions(search.search("chair")) == ["What is a chair?"]
+
+
+def test_edited_card_is_reindexed(vocab_deck):
+    search.search("table")
+    deck = decks.load_deck(vocab_deck.filepath)
+    deck.cards[2].update(question="What is a desk?")
+    deck.write_cards([deck.cards[2]])
+    assert questions(search.search("desk")) == ["What is a desk?"]
+    assert "What is a table?" not in questions(search.search("table"))
+
+
+def test_saved_deck_is_reindexed(vocab_deck):
+    search.search("table")
+    vocab_deck.cards.pop()
+    vocab_deck.save()
+    assert "What is a grid?" not in questions(search.search("grid"))
+
+
+def test_compacted_deck_is_not_reindexed_by_next_search(vocab_deck, monkeypatch):
+    search.search("table")
+    decks.append_card(vocab_deck.filepath, {"question": "What is a chair?", "answer": "A seat."})
+    decks.compact_deck(vocab_deck.filepath)
+    monkeypatch.setattr(search, "index_deck", lambda *args: pytest.fail("deck reindexed"))
+    assert questions(search.search("chair")) == ["What is a chair?"]
+
+
+def test_deck_changed_outside_app_is_reindexed(vocab_deck):
+    search.search("table")
+    content = decks.decode(vocab_deck.filepath.read_bytes())
+    content["cards"].append({"question": "What is a sofa?", "answer": "A couch."})
+    vocab_deck.filepath.write_bytes(decks.encode(content))
+    assert questions(search.search("couch")) == ["What is a sofa?"]
+
+
+def test_removed_deck_is_dropped_from_index(vocab_deck):
+    search.search("table")
+    vocab_deck.filepath.unlink()
+    assert search.search("table") == []
+
+
+def test_search_with_sqlite_backend(sqlite_backend, vocab_deck):
+    assert questions(search.search("furniture")) == ["What is a table?"]
+
+
+def test_search_command(vocab_deck):
+    result = CliRunner().invoke(main.search_cmd, ["mult", "tab"])
+    assert "Vocabulary: What is a multiplication table?" in result.output
+    assert "    A grid of products." in result.output
+
+
+def test_search_command_without_results(vocab_deck):
+    result = CliRunner().invoke(main.search_cmd, ["zebra"])
+    assert "No cards found." in result.output
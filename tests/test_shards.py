@@ -0,0 +1,129 @@
+"""Test decks stored as directories of shards."""
+import json
+
+import pytest
+
+from flashcards import decks, shards
+
+
+@pytest.fixture
+def sharded_math_deck(math_deck):
+    """The math deck, converted to shards of two cards."""
+    return decks.convert_deck(math_deck.filepath, "sharded", shard_size=2)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """The names of the files written atomically."""
+    names = []
+    write_atomically = decks.write_atomically
+
+    def record(filepath, data, backup=False):
+        names.append(filepath.name)
+        write_atomically(filepath, data, backup)
+
+    monkeypatch.setattr(decks, "write_atomically", record)
+    return names
+
+
+def test_convert_to_shards(math_deck, sharded_math_deck):
+    dirpath = sharded_math_deck.filepath
+    assert dirpath.suffix == decks.SHARDED_DECK_EXTENSION
+    assert sorted(path.name for path in dirpath.iterdir()) == [
+        "000000.json",
+        "000001.json",
+        "manifest.json",
+    ]
+    assert not math_deck.filepath.exists()
+    assert decks.generate_deck_filepath("Basic Math") == dirpath
+    assert json.loads((dirpath / "manifest.json").read_text())["counts"] == [2, 2]
+
+
+def test_sharded_deck_round_trip(math_deck, sharded_math_deck):
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    assert isinstance(deck.cards, shards.ShardedCards)
+    assert (deck.name, deck.description) == (math_deck.name, math_deck.description)
+    assert list(deck.cards) == math_deck.cards
+
+
+def test_shards_are_read_as_accessed(sharded_math_deck):
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    assert len(deck.cards) == 4
+    assert not deck.cards.shards
+    assert deck.cards[-1]["answer"] == "7"
+    assert list(deck.cards.shards) == [1]
+
+
+def test_cards_can_be_counted(sharded_math_deck):
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    assert deck.cards.count(deck.cards[0]) == 1
+
+
+def test_edit_rewrites_only_its_shard(sharded_math_deck, written):
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    deck.cards[3].update(answer="seven")
+    deck.write_cards([deck.cards[3]])
+    assert written == ["000001.json", "manifest.json", ".DECKINDEX"]
+
+    decks.deck_cache.clear()
+    assert decks.load_deck(sharded_math_deck.filepath).cards[3]["answer"] == "seven"
+
+
+def test_added_cards_fill_the_last_shard_then_new_ones(sharded_math_deck, written):
+    decks.append_cards(
+        sharded_math_deck.filepath,
+        [{"question": f"{i} + 0 = ?", "answer": str(i)} for i in range(3)],
+    )
+    assert written == ["000002.json", "000003.json", "manifest.json", ".DECKINDEX"]
+    assert not decks.journal_path(sharded_math_deck.filepath).exists()
+
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    assert deck.cards.counts == [2, 2, 2, 1]
+    assert [card["answer"] for card in deck.cards[4:]] == ["0", "1", "2"]
+    assert all("id" in card for card in deck.cards)
+
+
+def test_cards_not_in_manifest_are_ignored(sharded_math_deck):
+    # as left by a save that was interrupted before the manifest was written
+    shard = sharded_math_deck.filepath / "000001.json"
+    cards = json.loads(shard.read_text())
+    shard.write_text(json.dumps(cards + [{"question": "Q", "answer": "A", "id": "x"}]))
+
+    decks.deck_cache.clear()
+    deck = decks.load_deck(sharded_math_deck.filepath)
+    assert len(deck.cards) == 4
+    with pytest.raises(KeyError):
+        deck.get_card("x")
+
+
+def test_summary_of_sharded_deck(sharded_math_deck):
+    summary = decks.load_summary(sharded_math_deck.filepath)
+    assert summary == {
+        "name": "Basic Math",
+        "description": "For learning basic arithmetic.",
+        "count": 4,
+    }
+
+
+def test_deck_paths_include_sharded_decks(sharded_math_deck, german_deck):
+    assert decks.deck_paths() == [sharded_math_deck.filepath, german_deck.filepath]
+
+
+def test_convert_back_to_json(math_deck, sharded_math_deck):
+    deck = decks.convert_deck(sharded_math_deck.filepath, "json")
+    assert deck.filepath == math_deck.filepath
+    assert not sharded_math_deck.filepath.exists()
+    assert decks.load_deck(math_deck.filepath).cards == math_deck.cards
+
+
+def test_missing_manifest_key_raises_error(sharded_math_deck):
+    manifest = sharded_math_deck.filepath / "manifest.json"
+    manifest.write_text(json.dumps({"name": "Basic Math", "description": "", "counts": [2, 2]}))
+    decks.deck_cache.clear()
+    with pytest.raises(KeyError):
+        decks.load_deck(sharded_math_deck.filepath)
@@ -0,0 +1,54 @@
+"""
+Check that starting the application doesn't import modules that only some commands need.
+
+`flashcards status` is run in shell prompts and status lines, so startup time matters; see
+benchmarks/startup.py for the timing itself.
+"""
+import subprocess
+import sys
+
+import pytest
+
+DEFERRED_MODULES = [
+    "concurrent.futures",
+    "multiprocessing",
+    "orjson",
+    "random",
+    "shutil",
+    "sqlite3",
+    "subprocess",
+    "tempfile",
+    "flashcards.binary",
+    "flashcards.database",
+    "flashcards.editor",
+    "flashcards.search",
+    "flashcards.shards",
+    "flashcards.study",
+    "flashcards.transfer",
+]
+
+
+@pytest.fixture(scope="module")
+def imported_modules():
+    """Get the names of the modules imported by the entry point, per `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import flashcards.main"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    # lines look like "import time:   self [us] | cumulative | imported package"
+    return {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+def test_entry_point_is_imported(imported_modules):
+    assert "flashcards.main" in imported_modules
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_module_not_imported_at_startup(module, imported_modules):
+    assert module not in imported_modules
@@ -0,0 +1,239 @@
+"""Test the study session card pipeline."""
+import os
+import signal
+
+import pytest
+
+from flashcards import decks, study
+
+
+def test_permutation_yields_every_number_once():
+    for n in (1, 2, 3, 17, 1000, 4097):
+        numbers = list(study.Permutation(n))
+        assert sorted(numbers) == list(range(n))
+    assert numbers != list(range(4097))
+
+
+def test_permutation_of_nothing():
+    assert list(study.Permutation(0)) == []
+
+
+def test_permutation_is_given_by_seed():
+    assert list(study.Permutation(100, seed=1)) == list(study.Permutation(100, seed=1))
+    assert list(study.Permutation(100, seed=1)) != list(study.Permutation(100, seed=2))
+
+
+def test_permutation_is_computed_on_demand():
+    # any position of the order of a huge range is found immediately, without storing the order
+    permutation = study.Permutation(10 ** 12, seed=1)
+    numbers = [permutation[i] for i in (0, 1, 10 ** 12 - 1)]
+    assert len(set(numbers)) == 3
+    assert all(0 <= number < 10 ** 12 for number in numbers)
+    with pytest.raises(IndexError):
+        permutation[10 ** 12]
+
+
+def test_ordered_cards(math_deck, german_deck):
+    paths = [math_deck.filepath, german_deck.filepath]
+    cards = list(study.Session(paths, [4, 0], ordered=True).cards())
+    assert [card["question"] for deck, card in cards] == [c["question"] for c in math_deck.cards]
+    assert all(deck.name == "Basic Math" for deck, card in cards)
+
+
+def test_shuffled_cards_come_from_all_decks(math_deck, german_deck, italian_deck):
+    italian_deck.cards = [{"question": "Ciao?", "answer": "Hello"}]
+    italian_deck.save()
+    paths = [math_deck.filepath, german_deck.filepath, italian_deck.filepath]
+
+    cards = list(study.Session(paths, [4, 0, 1]).cards())
+    assert len(cards) == 5
+    assert {deck.name for deck, card in cards} == {"Basic Math", "Italian"}
+
+
+def test_shuffled_cards_are_given_by_seed(math_deck):
+    def questions(seed):
+        cards = study.Session([math_deck.filepath], [4], seed=seed).cards()
+        return [card["question"] for deck, card in cards]
+
+    assert questions(5) == questions(5)
+    assert sorted(questions(5)) == sorted(card["question"] for card in math_deck.cards)
+
+
+def test_cards_can_start_partway(math_deck, italian_deck):
+    italian_deck.cards = [{"question": "Ciao?", "answer": "Hello"}]
+    italian_deck.save()
+    paths = [math_deck.filepath, italian_deck.filepath]
+    for ordered in (True, False):
+        cards = list(study.Session(paths, [4, 1], ordered, seed=3).cards())
+        assert list(study.Session(paths, [4, 1], ordered, seed=3, position=2).cards()) == cards[2:]
+
+
+def test_only_decks_of_cards_reached_are_loaded(math_deck, german_deck, monkeypatch):
+    german_deck.cards = [{"question": "Hallo?", "answer": "Hello"}]
+    german_deck.save()
+    loaded = []
+    load_deck = decks.load_deck
+
+    def mock_load_deck(filepath):
+        loaded.append(filepath)
+        return load_deck(filepath)
+
+    monkeypatch.setattr(decks, "load_deck", mock_load_deck)
+    cards = study.Session([math_deck.filepath, german_deck.filepath], [4, 1]).cards()
+    next(cards)
+    assert len(loaded) == 1
+
+
+def test_cards_removed_since_counted_are_skipped(math_deck):
+    cards = list(study.Session([math_deck.filepath], [10]).cards())
+    assert len(cards) == 4
+
+
+def test_schedule_new_card():
+    fields = study.schedule({"question": "Q", "answer": "A"}, 4, now=0)
+    assert fields == {"ease": 2.5, "interval": 1, "repetitions": 1, "due": study.DAY}
+
+
+def test_schedule_intervals_grow_with_ease():
+    card = {"question": "Q", "answer": "A"}
+    intervals = []
+    for _ in range(4):
+        card.update(study.schedule(card, 5, now=0))
+        intervals.append(card["interval"])
+    assert intervals[:2] == [1, 6]
+    assert intervals[2] == round(6 * 2.7)
+    assert card["ease"] == 2.9
+
+
+def test_schedule_forgotten_card_starts_over():
+    card = {"question": "Q", "answer": "A", "ease": 2.5, "interval": 15, "repetitions": 3}
+    fields = study.schedule(card, 1, now=0)
+    assert fields["repetitions"] == 0
+    assert fields["interval"] == 1
+    assert fields["ease"] == 1.96
+
+
+def test_schedule_ease_has_minimum():
+    fields = study.schedule({"question": "Q", "answer": "A", "ease": 1.3}, 0, now=0)
+    assert fields["ease"] == study.MINIMUM_EASE
+
+
+def test_due_queue_only_has_due_cards_most_overdue_first(math_deck):
+    math_deck.cards[0]["due"] = 500
+    math_deck.cards[1]["due"] = 100
+    math_deck.cards[2]["due"] = 5000
+    math_deck.save()
+
+    queue = study.due_queue([math_deck.filepath], now=1000)
+    questions = [card["question"] for deck, card in study.iter_queue(queue)]
+    assert questions == ["2 + 5 = ?", "2 + 3 = ?", "2 + 2 = ?"]
+
+
+def test_due_queue_skips_decks_with_nothing_due(math_deck, german_deck, monkeypatch):
+    for card in math_deck.cards:
+        card["due"] = 5000
+    math_deck.save()
+    german_deck.save()
+    loaded = []
+    load_decks = decks.load_decks
+    monkeypatch.setattr(
+        decks, "load_decks", lambda paths: loaded.extend(paths) or load_decks(paths)
+    )
+
+    queue = study.due_queue([math_deck.filepath, german_deck.filepath], now=1000)
+    assert loaded == [german_deck.filepath]
+    assert len(queue) == len(german_deck.cards)
+
+
+def test_due_queue_loads_deck_with_card_due_sooner_since_saved(math_deck):
+    for card in math_deck.cards:
+        card["due"] = 5000
+    math_deck.save()
+    deck = decks.load_deck(math_deck.filepath)
+    deck.cards[0].update(due=500)
+    deck.write_cards([deck.cards[0]])  # recorded in the journal
+
+    queue = study.due_queue([math_deck.filepath], now=1000)
+    assert [card["question"] for _, card in study.iter_queue(queue)] == ["2 + 2 = ?"]
+
+
+def test_pending_edits_are_written_once_per_deck(math_deck, monkeypatch):
+    writes = []
+    monkeypatch.setattr(decks.Deck, "write_cards", lambda deck, cards, **kw: writes.append(cards))
+    deck = decks.load_deck(math_deck.filepath)
+
+    with study.PendingEdits(interval=3600) as edits:
+        for card in deck.cards:
+            edits.update_card(deck, card, ease=2.6)
+        edits.update_card(deck, deck.cards[0], answer="four")
+        assert not writes  # nothing is written until the session ends
+
+    assert [len(cards) for cards in writes] == [4]
+    assert deck.cards[0]["answer"] == "four"
+
+
+def test_pending_edits_are_saved_to_journal(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    with study.PendingEdits(interval=3600) as edits:
+        edits.update_card(deck, deck.cards[1], answer="five")
+        edits.update_card(deck, deck.cards[2], interval=6)
+
+    assert len(decks.read_journal(math_deck.filepath)) == 2
+    decks.deck_cache.clear()
+    cards = decks.load_deck(math_deck.filepath).cards
+    assert (cards[1]["answer"], cards[2]["interval"]) == ("five", 6)
+
+
+def test_pending_edits_are_flushed_after_interval(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    edits = study.PendingEdits(interval=0)
+    edits.update_card(deck, deck.cards[0], answer="four")
+    assert not edits.decks
+    assert len(decks.read_journal(math_deck.filepath)) == 1
+
+
+def test_pending_edits_are_flushed_when_session_is_interrupted(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    with pytest.raises(KeyboardInterrupt):
+        with study.PendingEdits(interval=3600) as edits:
+            edits.update_card(deck, deck.cards[0], answer="four")
+            raise KeyboardInterrupt
+    assert decks.read_journal(math_deck.filepath)[0]["answer"] == "four"
+
+
+def test_pending_edits_are_flushed_on_sigterm(math_deck):
+    deck = decks.load_deck(math_deck.filepath)
+    with pytest.raises(SystemExit):
+        with study.PendingEdits(interval=3600) as edits:
+            edits.update_card(deck, deck.cards[0], answer="four")
+            os.kill(os.getpid(), signal.SIGTERM)
+    assert decks.read_journal(math_deck.filepath)[0]["answer"] == "four"
+    assert signal.getsignal(signal.SIGTERM) is not study.exit_on_signal
+
+
+def test_session_is_saved_and_resumed(math_deck):
+    session = study.Session([math_deck.filepath], [4], seed=7)
+    with session:
+        cards = session.cards()
+        next(cards)
+        second = next(cards)
+    assert session.position == 1  # the second card was shown, but not done with
+
+    resumed = study.Session.load()
+    assert (resumed.deck_paths, resumed.counts, resumed.seed) == ([math_deck.filepath], [4], 7)
+    questions = [card["question"] for deck, card in resumed.cards()]
+    assert questions[0] == second[1]["question"]
+    assert len(questions) == 3
+
+
+def test_finished_session_is_not_kept(math_deck):
+    with study.Session([math_deck.filepath], [4]) as session:
+        list(session.cards())
+    assert study.Session.load() is None
+    assert not study.session_path().exists()
+
+
+def test_unreadable_session_is_ignored(create_storage_directory):
+    assert study.Session.load() is None
+    study.session_path().write_text("[1, 2")
+    assert study.Session.load() is None
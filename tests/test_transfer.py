@@ -0,0 +1,73 @@
+"""Test reading and writing cards in other formats."""
+import io
+
+import pytest
+
+from flashcards import transfer
+from flashcards.exceptions import ImportFileException
+
+
+def read(text: str, file_format: str) -> list:
+    return list(transfer.read_cards(io.StringIO(text), file_format))
+
+
+def write(cards: list, file_format: str) -> str:
+    file = io.StringIO()
+    transfer.write_cards(cards, file, file_format)
+    return file.getvalue()
+
+
+CARDS = [
+    {"question": "2 + 2 = ?", "answer": "4"},
+    {"question": "Say, with a comma", "answer": 'A "quoted"\nmulti-line answer'},
+]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "tsv", "jsonl", "anki"])
+def test_round_trip(file_format):
+    assert read(write(CARDS, file_format), file_format) == CARDS
+
+
+def test_csv_without_header():
+    assert read("Q1,A1\nQ2,A2\n", "csv") == [
+        {"question": "Q1", "answer": "A1"},
+        {"question": "Q2", "answer": "A2"},
+    ]
+
+
+def test_extra_columns_and_blank_rows_are_ignored():
+    assert read("Q1\tA1\ttag\n\nQ2\tA2\n", "tsv")[1] == {"question": "Q2", "answer": "A2"}
+
+
+def test_row_without_answer_raises_error():
+    with pytest.raises(ImportFileException, match="Line 3"):
+        read("question,answer\nQ1,A1\nQ2\n", "csv")
+
+
+def test_json_lines_keep_scheduling_fields_but_not_ids():
+    text = '{"question": "Q", "answer": "A", "id": "abc", "due": 100, "other": 1}\n'
+    assert read(text, "jsonl") == [{"question": "Q", "answer": "A", "due": 100}]
+
+
+def test_invalid_json_line_raises_error():
+    with pytest.raises(ImportFileException, match="Line 2: not valid json"):
+        read('{"question": "Q", "answer": "A"}\n{\n', "jsonl")
+
+
+def test_anki_export_with_html():
+    text = '#separator:Semicolon\n#html:true\n"What&nbsp;is 1 + 1?";Two<br>(2)\n'
+    assert read(text, "anki") == [{"question": "What\xa0is 1 + 1?", "answer": "Two\n(2)"}]
+
+
+def test_anki_export_with_guid_notetype_and_deck_columns():
+    text = (
+        "#separator:tab\n#html:false\n#guid column:1\n#notetype column:2\n#deck column:3\n"
+        "#tags column:6\nabc123\tBasic\tGerman\tthe dog\tder Hund\tnouns\n"
+    )
+    assert read(text, "anki") == [{"question": "the dog", "answer": "der Hund"}]
+
+
+def test_format_from_filename():
+    assert transfer.format_from_filename("cards.TSV") == "tsv"
+    assert transfer.format_from_filename("notes.txt") == "anki"
+    assert transfer.format_from_filename("cards.xlsx") is None